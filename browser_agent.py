@@ -1,44 +1,252 @@
 """Enhanced browser automation agent using Playwright with better error handling and waiting."""
 
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Literal, Union
+from contextlib import asynccontextmanager
 import asyncio
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import hashlib
+import os
+import re
+import socket
+import threading
+import time
+from playwright.async_api import async_playwright, Locator, TimeoutError as PlaywrightTimeoutError
 import base64
 import logging
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging, unless the application already has
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Port the shared Chromium instance exposes for CDP connections. 0 (the
+# default) picks a free port per launch, so several workers (or another
+# Chromium) on the same host never collide.
+CDP_PORT = int(os.getenv("BROWSER_CDP_PORT", "0"))
+
+# Default timeout (ms) for actions and navigations, set once per context
+BROWSER_TIMEOUT = 30000
+
+# How long (seconds) a get_content result is reused without re-checking the page
+CONTENT_CACHE_TTL = 1.0
+
+# Polled while settling a page: true once no new resources started since the last poll
+RESOURCES_SETTLED_JS = """() => {
+    const count = performance.getEntriesByType('resource').length;
+    const settled = window.__resourceCount === count;
+    window.__resourceCount = count;
+    return settled;
+}"""
+
+# JavaScript that extracts the title, URL and main text content of a page in
+# one round-trip. The candidate containers are one grouped selector, so the
+# document is walked only once; the first one with visible text wins, so an
+# empty wrapper doesn't hide the content. Whitespace is normalized on the
+# Python side.
+EXTRACT_CONTENT_JS = """() => ({
+    title: document.title,
+    url: location.href,
+    content: (([...document.querySelectorAll('main, article, .main-content, #content, .content')]
+        .find(e => (e.innerText || '').trim()) || document.body).innerText || '').slice(0, 10000)
+})"""
+
+# Collapses whitespace runs in extracted page text
+_WS_RE = re.compile(r'\s+')
+
+# Like EXTRACT_CONTENT_JS, but skips the extraction when the page is unchanged.
+# The version token changes whenever the URL, the document or its DOM changes;
+# a MutationObserver is installed on first call to count DOM changes. Returns
+# just {version} if it matches knownVersion.
+CONTENT_IF_CHANGED_JS = """(knownVersion) => {
+    if (window.__mutationCount === undefined) {
+        window.__mutationCount = 0;
+        new MutationObserver(() => { window.__mutationCount++; }).observe(document, {
+            subtree: true, childList: true, characterData: true, attributes: true
+        });
+    }
+    const version = location.href + ' ' + performance.timeOrigin + ':' + window.__mutationCount;
+    if (version === knownVersion) return {version};
+    return {version, ...(""" + EXTRACT_CONTENT_JS + """)()};
+}"""
+EXTRACT_CONTENT_HASH = hashlib.sha1(EXTRACT_CONTENT_JS.encode()).hexdigest()
+
+
+# Dedicated event loop that owns the shared browser. Playwright objects and
+# asyncio locks are bound to the loop that created them, so every BrowserPool
+# operation runs here whichever loop (uvicorn's, a worker thread's) calls it.
+BROWSER_LOOP = asyncio.new_event_loop()
+threading.Thread(target=BROWSER_LOOP.run_forever, name="browser-loop", daemon=True).start()
+
+
+async def run_on_browser_loop(coro):
+    """Await ``coro`` on BROWSER_LOOP from any event loop."""
+    if asyncio.get_running_loop() is BROWSER_LOOP:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, BROWSER_LOOP))
+
+
+def _free_port() -> int:
+    """Return a currently unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _new_context(browser):
+    """Open a context with the default action and navigation timeouts applied."""
+    context = await browser.new_context()
+    context.set_default_timeout(BROWSER_TIMEOUT)
+    context.set_default_navigation_timeout(BROWSER_TIMEOUT)
+    return context
+
+
+class BrowserPool:
+    """A single long-lived Chromium process shared by every BrowserAgent.
+
+    The browser is launched lazily on first use with remote debugging enabled;
+    agents connect to it over CDP and each gets its own BrowserContext, so the
+    process and its GPU/network subprocesses are paid for only once. Launch and
+    shutdown run on BROWSER_LOOP, so concurrent callers on different loops
+    never start a second browser. Each event loop shares one Playwright driver
+    for its connections (see connect).
+    """
+
+    def __init__(self, port: int = CDP_PORT):
+        self.port = port
+        self.playwright = None
+        self.browser = None
+        self._active_port = None
+        self._lock = asyncio.Lock()
+        # Event loop -> future of the Playwright driver used to connect from it
+        self._drivers: Dict[asyncio.AbstractEventLoop, asyncio.Future] = {}
+
+    @property
+    def endpoint(self) -> str:
+        """CDP endpoint of the shared browser."""
+        return f"http://127.0.0.1:{self._active_port or self.port}"
+
+    async def get_endpoint(self) -> str:
+        """Launch the shared browser if needed and return its CDP endpoint."""
+        return await run_on_browser_loop(self._get_endpoint())
+
+    async def _get_endpoint(self) -> str:
+        async with self._lock:
+            if self.browser is None or not self.browser.is_connected():
+                if self.playwright is None:
+                    self.playwright = await async_playwright().start()
+                self._active_port = self.port or _free_port()
+                self.browser = await self.playwright.chromium.launch(
+                    headless=True,
+                    args=[f"--remote-debugging-port={self._active_port}"]
+                )
+        return self.endpoint
+
+    async def connect(self):
+        """Return a browser handle usable from the calling event loop.
+
+        On BROWSER_LOOP this is the launched browser itself. Other loops get a
+        new CDP connection through that loop's shared Playwright driver; the
+        caller closes it when done (see is_shared).
+        """
+        endpoint = await self.get_endpoint()
+        loop = asyncio.get_running_loop()
+        if loop is BROWSER_LOOP:
+            return self.browser
+        driver = self._drivers.get(loop)
+        if driver is None:
+            driver = self._drivers[loop] = asyncio.ensure_future(async_playwright().start())
+        return await (await driver).chromium.connect_over_cdp(endpoint)
+
+    def is_shared(self, browser) -> bool:
+        """Whether ``browser`` is the launched browser, which callers must not close."""
+        return browser is self.browser
+
+    async def acquire(self) -> "BrowserAgent":
+        """Return a started BrowserAgent with its own context on the shared browser."""
+        agent = BrowserAgent(pool=self)
+        await agent.start()
+        return agent
+
+    async def shutdown(self) -> None:
+        """Terminate the shared browser process and the calling loop's driver."""
+        driver = self._drivers.pop(asyncio.get_running_loop(), None)
+        if driver is not None:
+            try:
+                await (await driver).stop()
+            except Exception as e:
+                logger.warning("Failed to stop Playwright driver: %s", e)
+        await run_on_browser_loop(self._shutdown())
+
+    async def _shutdown(self) -> None:
+        async with self._lock:
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+            self.browser = None
+            self.playwright = None
+            self._active_port = None
+
+
 class BrowserAgent:
-    def __init__(self):
+    def __init__(self, pool: Optional[BrowserPool] = None):
+        self.pool = pool
         self.browser = None
         self.context = None
         self.page = None
-        self.playwright = None
+        # (version token, result) of the last get_content call
+        self._content_cache: Optional[tuple] = None
+        # (url, script hash) -> (timestamp, result) for back-to-back evaluations
+        self._eval_cache: Dict[tuple, tuple] = {}
+        # Locators by selector, valid until the next navigation
+        self._locator_cache: Dict[str, Locator] = {}
+
+    def _clear_caches(self) -> None:
+        """Drop cached locators and results, which are bound to the current page."""
+        self._content_cache = None
+        self._eval_cache.clear()
+        self._locator_cache.clear()
+
+    @classmethod
+    def for_context(cls, context, page) -> "BrowserAgent":
+        """Wrap an already open context and page, e.g. one checked out of a pool."""
+        agent = cls()
+        agent.context = context
+        agent.page = page
+        return agent
 
     async def start(self):
-        """Initialize the browser instance."""
+        """Connect to the shared browser and open a fresh context and page."""
+        self._clear_caches()
         try:
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(headless=False)
-            self.context = await self.browser.new_context()
+            self.browser = await (self.pool or browser_pool).connect()
+            self.context = await _new_context(self.browser)
             self.page = await self.context.new_page()
             return {"status": "Browser started"}
         except Exception as e:
-            logger.error(f"Failed to start browser: {str(e)}")
+            logger.error("Failed to start browser: %s", e)
             return {"error": f"Failed to start browser: {str(e)}"}
 
-    async def navigate(self, url: str, timeout: int = 30000) -> Dict[str, Any]:
+    async def navigate(
+        self,
+        url: str,
+        timeout: Optional[int] = None,
+        wait_until: Literal["domcontentloaded", "load", "networkidle"] = "domcontentloaded"
+    ) -> Dict[str, Any]:
         """Navigate to a URL with improved error handling and timeout management.
         
         Args:
             url: The URL to navigate to
-            timeout: Maximum navigation time in milliseconds
+            timeout: Maximum navigation time in milliseconds (defaults to the
+                context's BROWSER_TIMEOUT)
+            wait_until: Load state to wait for. "networkidle" does not use
+                Playwright's networkidle (which can hang on analytics-heavy pages);
+                it waits for "load" and then briefly for resource loading to settle.
             
         Returns:
-            Dict containing navigation results or error information
+            Dict containing navigation results or error information. Failed
+            navigations are not retried here; callers that want retries should
+            do so at a higher level (e.g. with exponential backoff).
         """
         if not self.page:
             return {"error": "Browser not initialized. Call /browser/start first."}
@@ -48,17 +256,17 @@ class BrowserAgent:
             if not url.startswith(('http://', 'https://')):
                 url = f'https://{url}'
                 
-            logger.info(f"Navigating to: {url}")
+            logger.info("Navigating to: %s", url)
             
-            # Set default navigation timeout
-            self.page.set_default_navigation_timeout(timeout)
+            self._locator_cache.clear()
+            self._eval_cache.clear()
             
-            # Try to navigate with networkidle as the primary wait condition
             try:
-                response = await self.page.goto(url, wait_until="domcontentloaded")
-                
-                # Wait for the page to be fully loaded
-                await self.page.wait_for_load_state("networkidle", timeout=timeout/2)
+                if wait_until == "networkidle":
+                    response = await self.page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+                    await self._settle()
+                else:
+                    response = await self.page.goto(url, wait_until=wait_until, timeout=timeout)
                 
                 # Get the final URL after redirects
                 final_url = self.page.url
@@ -73,7 +281,7 @@ class BrowserAgent:
                 
             except PlaywrightTimeoutError as e:
                 # If navigation times out, try to get whatever content is available
-                logger.warning(f"Navigation to {url} timed out, but continuing with partial load")
+                logger.warning("Navigation to %s timed out, but continuing with partial load", url)
                 final_url = self.page.url
                 title = await self.page.title()
                 
@@ -87,40 +295,90 @@ class BrowserAgent:
                 
         except Exception as e:
             error_msg = f"Navigation to {url} failed: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            
-            # Try to recover by reloading the page
-            try:
-                if self.page:
-                    await self.page.reload(wait_until="domcontentloaded")
-                    return {
-                        "url": self.page.url,
-                        "title": await self.page.title(),
-                        "status": 200,
-                        "warning": f"Recovered from navigation error: {str(e)}",
-                        "message": "Page recovered after navigation error"
-                    }
-            except Exception as reload_error:
-                logger.error(f"Failed to recover page after navigation error: {str(reload_error)}")
+            logger.error("Navigation to %s failed: %s", url, e, exc_info=True)
             
             return {
                 "error": error_msg,
                 "suggestion": "The page may have loaded partially. Try getting content or taking a screenshot."
             }
 
-    async def click(self, selector: str) -> Dict[str, Any]:
-        """Click an element matching the selector."""
+    async def _settle(self, timeout: int = 2000) -> None:
+        """Wait a bounded time for the page to load and stop fetching resources."""
+        try:
+            await self.page.wait_for_load_state("load", timeout=timeout)
+            await self.page.wait_for_function(RESOURCES_SETTLED_JS, polling=250, timeout=timeout)
+        except PlaywrightTimeoutError:
+            pass
+
+    async def navigate_many(self, urls: List[str], concurrency: int = 10) -> List[Dict[str, Any]]:
+        """Load several URLs concurrently in separate tabs of this context.
+
+        Each URL is opened in its own page, its content extracted and the page
+        closed again; at most ``concurrency`` pages are open at a time.
+
+        Args:
+            urls: The URLs to load
+            concurrency: Maximum number of tabs loading at once
+
+        Returns:
+            One result per URL, in input order, with the title, URL and content
+            of the page or an error
+        """
+        if not self.context:
+            return [{"url": url, "error": "Browser not initialized. Call /browser/start first."}
+                    for url in urls]
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _load(url: str) -> Dict[str, Any]:
+            if not url.startswith(('http://', 'https://')):
+                url = f'https://{url}'
+            async with semaphore:
+                page = await self.context.new_page()
+                try:
+                    await page.goto(url, wait_until="domcontentloaded")
+                    result = await page.evaluate(EXTRACT_CONTENT_JS)
+                    result["content"] = _WS_RE.sub(' ', result["content"]).strip()
+                    return result
+                finally:
+                    await page.close()
+
+        results = await asyncio.gather(*(_load(url) for url in urls), return_exceptions=True)
+        for i, result in enumerate(results):
+            if isinstance(result, BaseException):
+                logger.error("Navigation to %s failed: %s", urls[i], result)
+                results[i] = {"url": urls[i], "error": f"Navigation to {urls[i]} failed: {str(result)}"}
+        return results
+
+    def _locator(self, selector: str) -> Locator:
+        """Return the cached locator for a selector, creating it on first use.
+
+        Uses the first match, like page.click/page.fill, rather than strict mode.
+        """
+        locator = self._locator_cache.get(selector)
+        if locator is None:
+            locator = self._locator_cache[selector] = self.page.locator(selector).first
+        return locator
+
+    async def click(self, selector: str, timeout: Optional[int] = None) -> Dict[str, Any]:
+        """Click an element matching the selector.
+        
+        Args:
+            selector: Element selector
+            timeout: Optional timeout in milliseconds (defaults to the context's BROWSER_TIMEOUT)
+        """
         if not self.page:
             return {"error": "Browser not initialized. Call /browser/start first."}
         
         try:
-            await self.page.click(selector, timeout=30000)
+            await self._locator(selector).click(timeout=timeout)
+            self._eval_cache.clear()
             return {"status": f"Clicked element: {selector}"}
         except PlaywrightTimeoutError:
-            logger.error(f"Click timed out: {selector}")
+            logger.error("Click timed out: %s", selector)
             return {"error": f"Click timed out: {selector}"}
         except Exception as e:
-            logger.error(f"Click failed: {str(e)}")
+            logger.error("Click failed: %s", e)
             return {"error": f"Click failed: {str(e)}"}
 
     async def type_text(self, selector: str, text: str) -> Dict[str, Any]:
@@ -129,13 +387,14 @@ class BrowserAgent:
             return {"error": "Browser not initialized. Call /browser/start first."}
         
         try:
-            await self.page.fill(selector, text, timeout=30000)
+            await self._locator(selector).fill(text)
+            self._eval_cache.clear()
             return {"status": f"Typed text into: {selector}"}
         except PlaywrightTimeoutError:
-            logger.error(f"Type text timed out: {selector}")
+            logger.error("Type text timed out: %s", selector)
             return {"error": f"Type text timed out: {selector}"}
         except Exception as e:
-            logger.error(f"Type text failed: {str(e)}")
+            logger.error("Type text failed: %s", e)
             return {"error": f"Type text failed: {str(e)}"}
 
     async def get_content(self) -> Dict[str, str]:
@@ -144,54 +403,27 @@ class BrowserAgent:
             return {"error": "No active page. Call /browser/start first."}
         
         try:
-            # Get the page title
-            title = await self.page.title()
+            # Back-to-back calls reuse the result without touching the page
+            url = self.page.url
+            eval_key = (url, EXTRACT_CONTENT_HASH)
+            cached = self._eval_cache.get(eval_key)
+            if cached and time.monotonic() - cached[0] < CONTENT_CACHE_TTL:
+                return dict(cached[1])
             
-            # Execute JavaScript to extract the main content
-            content = await self.page.evaluate("""() => {
-                // Try to get the main content
-                let content = '';
-                
-                // Try common content selectors
-                const selectors = [
-                    'main',
-                    'article',
-                    '.main-content',
-                    '#content',
-                    '.content',
-                    'body'
-                ];
-                
-                for (const selector of selectors) {
-                    const element = document.querySelector(selector);
-                    if (element) {
-                        content = element.innerText || '';
-                        if (content.trim().length > 0) break;
-                    }
-                }
-                
-                // If no content found, fall back to body
-                if (!content || content.trim().length === 0) {
-                    content = document.body.innerText || '';
-                }
-                
-                // Clean up the content
-                content = content
-                    .replace(/\\s+/g, ' ')
-                    .trim()
-                    .substring(0, 10000);  // Limit content length
-                    
-                return content;
-            }""")
-            
-            return {
-                "title": title,
-                "content": content,
-                "url": self.page.url
-            }
+            # Title, URL and content in a single evaluate; the extraction is
+            # skipped in the page if the document hasn't changed since last time
+            known_version = self._content_cache[0] if self._content_cache else None
+            response = await self.page.evaluate(CONTENT_IF_CHANGED_JS, known_version)
+            version = response.pop("version")
+            if response:
+                response["content"] = _WS_RE.sub(' ', response["content"]).strip()
+                self._content_cache = (version, response)
+            result = self._content_cache[1]
+            self._eval_cache[eval_key] = (time.monotonic(), result)
+            return dict(result)
             
         except Exception as e:
-            logger.error(f"Failed to get page content: {str(e)}")
+            logger.error("Failed to get page content: %s", e)
             return {
                 "error": f"Failed to get page content: {str(e)}",
                 "title": "",
@@ -199,31 +431,50 @@ class BrowserAgent:
                 "url": self.page.url if self.page else ""
             }
 
-    async def take_screenshot(self) -> Dict[str, Any]:
-        """Take a screenshot of the current page."""
+    async def take_screenshot(self, encode: bool = True, path: Optional[str] = None) -> Dict[str, Any]:
+        """Take a screenshot of the current page.
+        
+        Args:
+            encode: Return the PNG base64-encoded (as ASCII bytes) rather than raw
+            path: Write the PNG to this file instead of returning it
+            
+        Returns:
+            Dict with "screenshot" (base64 bytes), "screenshot_bytes" (raw PNG)
+            or "path", depending on the arguments
+        """
         if not self.page:
             return {"error": "Browser not initialized. Call /browser/start first."}
         
         try:
+            if path:
+                await self.page.screenshot(type="png", path=path)
+                return {"path": path, "type": "image/png"}
+            
             screenshot = await self.page.screenshot(type="png")
+            if not encode:
+                return {"screenshot_bytes": screenshot, "type": "image/png"}
             return {
-                "screenshot": base64.b64encode(screenshot).decode("utf-8"),
+                "screenshot": base64.b64encode(screenshot),
                 "type": "image/png"
             }
         except Exception as e:
-            logger.error(f"Screenshot failed: {str(e)}")
+            logger.error("Screenshot failed: %s", e)
             return {"error": f"Screenshot failed: {str(e)}"}
 
     async def close(self) -> Dict[str, Any]:
-        """Close the browser instance."""
-        if self.browser:
+        """Close this agent's context and disconnect from the shared browser.
+
+        The shared Chromium process and Playwright driver keep running; closing
+        a CDP-connected browser only drops the connection.
+        """
+        if self.context:
+            await self.context.close()
+        if self.browser and not (self.pool or browser_pool).is_shared(self.browser):
             await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
         self.browser = None
         self.context = None
         self.page = None
-        self.playwright = None
+        self._clear_caches()
         return {"status": "Browser closed"}
 
     async def get_cookies(self) -> Dict[str, Any]:
@@ -235,7 +486,7 @@ class BrowserAgent:
             cookies = await self.context.cookies()
             return {"cookies": cookies}
         except Exception as e:
-            logger.error(f"Failed to get cookies: {str(e)}")
+            logger.error("Failed to get cookies: %s", e)
             return {"error": f"Failed to get cookies: {str(e)}"}
 
     async def add_cookies(self, cookies: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -247,7 +498,7 @@ class BrowserAgent:
             await self.context.add_cookies(cookies)
             return {"status": "Cookies added"}
         except Exception as e:
-            logger.error(f"Failed to add cookies: {str(e)}")
+            logger.error("Failed to add cookies: %s", e)
             return {"error": f"Failed to add cookies: {str(e)}"}
 
     async def delete_cookies(self, cookies: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -259,8 +510,113 @@ class BrowserAgent:
             await self.context.delete_cookies(cookies)
             return {"status": "Cookies deleted"}
         except Exception as e:
-            logger.error(f"Failed to delete cookies: {str(e)}")
+            logger.error("Failed to delete cookies: %s", e)
             return {"error": f"Failed to delete cookies: {str(e)}"}
 
+class BrowserContextPool:
+    """Fresh BrowserContexts on the shared browser, one per workflow.
+
+    A context is never reused: on release it is closed, which drops its cookies,
+    every origin's storage (local/session storage, IndexedDB, Cache Storage) and
+    its service workers, so nothing leaks into the next workflow. To keep
+    checkout fast, ``warm`` unused contexts (``BROWSER_CONTEXT_POOL_WARM``,
+    default 1) are created ahead of time with a page already open. At most
+    ``max_size`` (``BROWSER_CONTEXT_POOL_SIZE``, default 8) are checked out at once.
+    The warm queue is refilled in the background on BROWSER_LOOP, so releasing
+    a context never waits for a new one to be created.
+    """
+
+    def __init__(self, browser_pool: BrowserPool, max_size: Optional[int] = None,
+                 warm: Optional[int] = None):
+        self.browser_pool = browser_pool
+        self.max_size = max_size or int(os.getenv("BROWSER_CONTEXT_POOL_SIZE", "8"))
+        self.warm = warm if warm is not None else int(os.getenv("BROWSER_CONTEXT_POOL_WARM", "1"))
+        self.browser = None
+        self._warm: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_size)
+        self._lock = asyncio.Lock()
+        self._refill_lock = asyncio.Lock()
+        self._refill_future = None
+        self._closed = False
+
+    async def _connect(self):
+        """Get a handle on the shared browser once and reuse it for every context."""
+        async with self._lock:
+            if self.browser is None or not self.browser.is_connected():
+                self.browser = await self.browser_pool.connect()
+        return self.browser
+
+    async def _create(self) -> BrowserAgent:
+        browser = await self._connect()
+        context = await _new_context(browser)
+        page = await context.new_page()
+        return BrowserAgent.for_context(context, page)
+
+    async def _checkout(self) -> BrowserAgent:
+        while not self._warm.empty():
+            agent = self._warm.get_nowait()
+            if not agent.page.is_closed():
+                return agent
+            # The context died while idle (e.g. the browser restarted)
+        return await self._create()
+
+    async def _refill(self) -> None:
+        """Top the warm queue back up; a failure only costs a cold checkout later."""
+        async with self._refill_lock:
+            try:
+                while self._warm.qsize() < self.warm:
+                    self._warm.put_nowait(await self._create())
+            except Exception as e:
+                logger.warning("Could not pre-create a browser context: %s", e)
+
+    def _schedule_refill(self) -> None:
+        if self._closed or (self._refill_future is not None and not self._refill_future.done()):
+            return
+        self._refill_future = asyncio.run_coroutine_threadsafe(self._refill(), BROWSER_LOOP)
+
+    async def release(self, agent: BrowserAgent) -> None:
+        """Close an agent's context and start pre-creating its replacement."""
+        try:
+            await agent.context.close()
+        except Exception as e:
+            logger.warning("Failed to close browser context: %s", e)
+        self._schedule_refill()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Check out a fresh context-scoped BrowserAgent for the duration of the block."""
+        async with self._slots:
+            agent = await self._checkout()
+            try:
+                yield agent
+            finally:
+                await self.release(agent)
+
+    async def shutdown(self) -> None:
+        """Close the warm contexts and any connection this pool opened to the shared browser."""
+        await run_on_browser_loop(self._shutdown())
+
+    async def _shutdown(self) -> None:
+        self._closed = True
+        if self._refill_future is not None:
+            self._refill_future.cancel()
+        async with self._refill_lock, self._lock:
+            while not self._warm.empty():
+                agent = self._warm.get_nowait()
+                try:
+                    await agent.context.close()
+                except Exception:
+                    pass
+            if self.browser and not self.browser_pool.is_shared(self.browser):
+                await self.browser.close()
+            self.browser = None
+
+
+# Shared browser process used by all agents
+browser_pool = BrowserPool()
+
+# Warm contexts on the shared browser, checked out per workflow
+context_pool = BrowserContextPool(browser_pool)
+
 # Global browser agent instance
 browser_agent = BrowserAgent()
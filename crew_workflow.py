@@ -5,11 +5,12 @@ and a browser agent (Playwright-based automation).
 """
 
 import asyncio
+import functools
 import json
 import os
 from typing import Dict, Any, Optional, List
 import aiohttp
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 # Try to import CrewAI components
 import logging
@@ -101,30 +102,74 @@ except ImportError:
     BaseTool = DummyBaseTool
     logger = DummyLogger()
 
+def _json_default(obj: Any) -> Any:
+    # Base64 payloads (e.g. screenshots) come back from the browser agent as bytes
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("ascii")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, indent=2, default=_json_default)
+
 # Import our browser agent
-from browser_agent import BrowserAgent as PlaywrightBrowserAgent
+from browser_agent import BrowserAgent as PlaywrightBrowserAgent, BROWSER_LOOP, context_pool
+
+# Import LLM utilities
+try:
+    from llm_utils import LLMConfig, get_llm
+except ImportError:
+    LLMConfig = get_llm = None
 
 # Configuration
 BROWSER_TIMEOUT = 30000  # 30 seconds
+# Verbose crew/agent output dumps every tool result into the logs; opt in only
+VERBOSE = os.getenv("CREW_VERBOSE", "0") == "1"
+
+# All browser work runs on the browser module's dedicated loop. CrewAI calls
+# tools synchronously from worker threads, so they submit their coroutines
+# there instead of trying to drive (or re-enter) whatever loop is current.
+_LOOP = BROWSER_LOOP
 
 
 class BrowserToolInput(BaseModel):
     """Input model for browser tool."""
+    # Frozen so instances shared through the parse cache can't be mutated
+    model_config = ConfigDict(frozen=True)
+
     action: str
     url: Optional[str] = None
+    urls: Optional[List[str]] = None
     selector: Optional[str] = None
     text: Optional[str] = None
     cookies: Optional[List[Dict[str, Any]]] = None
 
 
+@functools.lru_cache(maxsize=512)
+def _parse_tool_input(tool_input: str) -> BrowserToolInput:
+    """Parse and validate a raw tool input string.
+
+    Agents often repeat the exact same tool invocation, so results are cached
+    by the raw string.
+    """
+    return BrowserToolInput(**json.loads(tool_input))
+
+
 class BrowserTool(BaseTool):
     """Tool for browser automation."""
     name: str = "browser_tool"
     description: str = """Useful for interacting with web browsers.
     
     Input should be a JSON string with the following fields:
-    - action: One of 'navigate', 'click', 'type', 'screenshot', 'get_content', 'get_cookies', 'add_cookies', 'delete_cookies'
+    - action: One of 'navigate', 'navigate_many', 'click', 'type', 'screenshot', 'get_content', 'get_cookies', 'add_cookies', 'delete_cookies'
     - url: URL to navigate to (required for 'navigate' action)
+    - urls: JSON array of URLs to load in parallel tabs (required for 'navigate_many' action)
     - selector: CSS selector for the element to interact with (required for 'click' and 'type' actions)
     - text: Text to type (required for 'type' action)
     - cookies: List of cookie objects (required for 'add_cookies' and 'delete_cookies' actions)
@@ -138,17 +183,17 @@ class BrowserTool(BaseTool):
         """Execute the browser tool synchronously.
         
         This is a wrapper around the async _arun method to maintain compatibility
-        with the BaseTool interface.
+        with the BaseTool interface. The coroutine runs on the browser loop, so
+        this must not be called from that loop's own thread.
         """
-        return asyncio.get_event_loop().run_until_complete(self._arun(tool_input))
+        return asyncio.run_coroutine_threadsafe(self._arun(tool_input), _LOOP).result()
     
     async def _arun(self, tool_input: str) -> str:
         """Execute the browser tool asynchronously."""
         try:
             # Parse the input
             try:
-                input_data = json.loads(tool_input)
-                validated_input = BrowserToolInput(**input_data)
+                validated_input = _parse_tool_input(tool_input)
             except (json.JSONDecodeError, ValueError) as e:
                 return f"Invalid input format: {str(e)}"
             
@@ -160,6 +205,11 @@ class BrowserTool(BaseTool):
                     return "Error: URL is required for 'navigate' action"
                 result = await self.browser_agent.navigate(validated_input.url)
                 
+            elif action == 'navigate_many':
+                if not validated_input.urls:
+                    return "Error: URLs are required for 'navigate_many' action"
+                result = await self.browser_agent.navigate_many(validated_input.urls)
+                
             elif action == 'click':
                 if not validated_input.selector:
                     return "Error: Selector is required for 'click' action"
@@ -196,7 +246,7 @@ class BrowserTool(BaseTool):
                 return f"Error: Unknown action '{action}'"
             
             # Return the result as a string
-            return json.dumps(result, indent=2)
+            return _dumps(result)
             
         except Exception as e:
             import traceback
@@ -204,7 +254,33 @@ class BrowserTool(BaseTool):
             return f"Error in browser tool: {str(e)}\n\n{error_trace}"
 
 
-def run_avatar_workflow(prompt: str) -> Dict[str, Any]:
+class MockLLM:
+    """Fallback LLM used when the configured LLM can't be initialized."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, prompt, **kwargs):
+        # Return a simple response for testing
+        return "This is a mock response for testing purposes."
+
+
+@functools.lru_cache(maxsize=4)
+def _get_workflow_llm(provider: str):
+    """Build the LLM for a provider once and reuse it across workflows.
+
+    The model comes from the provider's LLMConfig defaults, so the provider
+    alone identifies the instance. Failures are not cached.
+    """
+    if get_llm is None:
+        raise ImportError("llm_utils is not available")
+    llm_config = LLMConfig(provider=provider)
+    llm = get_llm(llm_config)
+    logger.info(f"Using {llm_config.provider.value.upper()} LLM with model: {llm_config.config['model_name']}")
+    return llm
+
+
+async def run_avatar_workflow(prompt: str) -> Dict[str, Any]:
     """Run a CrewAI workflow with browser automation capabilities.
     
     Args:
@@ -217,106 +293,86 @@ def run_avatar_workflow(prompt: str) -> Dict[str, Any]:
         return {"error": "CrewAI not installed. Run `pip install crewai`."}
     
     async def _run_workflow():
-        # Initialize the browser agent
-        browser_agent = PlaywrightBrowserAgent()
-        await browser_agent.start()
-        
-        try:
-            # 1. Define the browser tool
-            browser_tool = BrowserTool(browser_agent)
-            
-            # Import LLM utilities
-            try:
-                from llm_utils import LLMConfig, get_llm, LLMProvider
-                
-                # Create LLM config from environment variables
-                llm_config = LLMConfig(provider=os.getenv("LLM_PROVIDER", "openai"))
-                
-            except ImportError:
-                # Fallback to mock LLM if llm_utils is not available
-                class MockLLM:
-                    def __init__(self, *args, **kwargs):
-                        pass
-                        
-                    def __call__(self, prompt, **kwargs):
-                        # Return a simple response for testing
-                        return "This is a mock response for testing purposes."
-                    
-            # 3. Define the avatar agent with access to the browser tool
+        # Check out a warm, context-scoped browser agent from the pool
+        async with context_pool.acquire() as browser_agent:
             try:
-                # Get the configured LLM
-                llm = get_llm(llm_config)
-                logger.info(f"Using {llm_config.provider.value.upper()} LLM with model: {llm_config.config['model_name']}")
-                
-            except Exception as e:
-                logger.error(f"Error initializing LLM: {e}")
-                logger.warning("Falling back to mock LLM")
-                llm = MockLLM()  # Fallback to mock if LLM initialization fails
-                
-                # Create the agent with all required parameters
-                avatar = Agent(
-                    role="AI Assistant with Web Browsing",
-                    goal="Help users by answering questions and performing web-based tasks",
-                    backstory="""You are an AI assistant with the ability to browse the web. 
-                    Use the browser tool to gather information or perform actions when needed.
-                    Always verify information from the web when possible.""",
-                    tools=[browser_tool],
-                    verbose=True,
-                    llm=llm,  # Use either real or mock LLM
-                    max_iter=3,  # Limit the number of interactions
-                    allow_delegation=False,  # Don't allow delegation to other agents
-                    max_rpm=10  # Rate limit: 10 requests per minute
-                )
-                logger.info("Successfully created CrewAI Agent")
-                
-            except Exception as e:
-                logger.error(f"Failed to initialize CrewAI Agent: {str(e)}")
-                # Create a minimal agent with mock LLM as fallback
-                logger.warning("Creating minimal agent with mock LLM")
-                avatar = Agent(
-                    role="AI Assistant with Web Browsing",
-                    goal="Help users by answering questions and performing web-based tasks",
-                    backstory="""You are an AI assistant with the ability to browse the web.""",
-                    tools=[browser_tool],
-                    verbose=True,
-                    llm=MockLLM()
-                )
+                # 1. Define the browser tool
+                browser_tool = BrowserTool(browser_agent)
             
-            # 3. Create a task for the avatar
-            task = Task(
-                agent=avatar,
-                description=f"Help the user with their request: {prompt}",
-                expected_output="A helpful response that addresses the user's request, possibly including information gathered from the web.",
-                tools=[browser_tool]
-            )
+                # 2. Get the configured LLM, shared across workflows
+                try:
+                    llm = _get_workflow_llm(os.getenv("LLM_PROVIDER", "openai"))
+                except Exception as e:
+                    logger.error(f"Error initializing LLM: {e}")
+                    logger.warning("Falling back to mock LLM")
+                    llm = MockLLM()  # Fallback to mock if LLM initialization fails
             
-            # 4. Create and run the crew
-            crew = Crew(
-                agents=[avatar],
-                tasks=[task],
-                process=Process.sequential,
-                verbose=2
-            )
+                # 3. Define the avatar agent with access to the browser tool
+                try:
+                    avatar = Agent(
+                        role="AI Assistant with Web Browsing",
+                        goal="Help users by answering questions and performing web-based tasks",
+                        backstory="""You are an AI assistant with the ability to browse the web. 
+                        Use the browser tool to gather information or perform actions when needed.
+                        Always verify information from the web when possible.""",
+                        tools=[browser_tool],
+                        verbose=VERBOSE,
+                        llm=llm,  # Use either real or mock LLM
+                        max_iter=3,  # Limit the number of interactions
+                        allow_delegation=False,  # Don't allow delegation to other agents
+                        max_rpm=10  # Rate limit: 10 requests per minute
+                    )
+                    logger.info("Successfully created CrewAI Agent")
+                
+                except Exception as e:
+                    logger.error(f"Failed to initialize CrewAI Agent: {str(e)}")
+                    # Create a minimal agent with mock LLM as fallback
+                    logger.warning("Creating minimal agent with mock LLM")
+                    avatar = Agent(
+                        role="AI Assistant with Web Browsing",
+                        goal="Help users by answering questions and performing web-based tasks",
+                        backstory="""You are an AI assistant with the ability to browse the web.""",
+                        tools=[browser_tool],
+                        verbose=VERBOSE,
+                        llm=MockLLM()
+                    )
             
-            # 5. Execute the workflow
-            result = crew.run()
+                # 4. Create a task for the avatar
+                task = Task(
+                    agent=avatar,
+                    description=f"Help the user with their request: {prompt}",
+                    expected_output="A helpful response that addresses the user's request, possibly including information gathered from the web.",
+                    tools=[browser_tool]
+                )
             
-            # 6. Get the final state of the browser (optional)
-            final_content = await browser_agent.get_content()
+                # 5. Create the crew
+                crew = Crew(
+                    agents=[avatar],
+                    tasks=[task],
+                    process=Process.sequential,
+                    verbose=VERBOSE
+                )
             
-            return {
-                "result": result,
-                "browser_content": final_content.get('content', '') if final_content else None
-            }
+                # 6. Execute the workflow in a worker thread; the crew calls the
+                # browser tool synchronously, which needs this loop to be free
+                result = await asyncio.to_thread(crew.kickoff)
             
-        except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
-            return {"error": f"Workflow execution failed: {str(e)}\n\n{error_trace}"}
+                # 7. Get the final state of the browser (optional), unless
+                # no action ever moved the page off about:blank
+                final_content = None
+                if browser_agent.page.url != "about:blank":
+                    final_content = await browser_agent.get_content()
             
-        finally:
-            # Always close the browser when done
-            await browser_agent.close()
-    
-    # Run the async workflow in the event loop
-    return asyncio.get_event_loop().run_until_complete(_run_workflow())
+                return {
+                    "result": result,
+                    "browser_content": final_content.get('content', '') if final_content else None
+                }
+            
+            except Exception as e:
+                import traceback
+                error_trace = traceback.format_exc()
+                return {"error": f"Workflow execution failed: {str(e)}\n\n{error_trace}"}
+
+    # Run the workflow on the browser loop, where the pooled contexts live
+    future = asyncio.run_coroutine_threadsafe(_run_workflow(), _LOOP)
+    return await asyncio.wrap_future(future)
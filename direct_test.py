@@ -2,6 +2,8 @@
 import os
 import sys
 import logging
+import functools
+import httpx
 from dotenv import load_dotenv
 from openai import OpenAI
 
@@ -12,6 +14,22 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+@functools.lru_cache(maxsize=1)
+def get_client(api_key: str) -> OpenAI:
+    """Return a shared OpenRouter client so repeated calls reuse its connections."""
+    return OpenAI(
+        base_url="https://openrouter.ai/api/v1",
+        api_key=api_key,
+        default_headers={
+            "HTTP-Referer": "https://github.com/yourusername/avatar-crew",
+            "X-Title": "Avatar-Crew Test"
+        },
+        http_client=httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20)
+        )
+    )
+
 def test_openrouter_direct():
     """Test OpenRouter API directly."""
     api_key = os.getenv("OPENROUTER_API_KEY")
@@ -25,15 +43,7 @@ def test_openrouter_direct():
     try:
         logger.info("Sending test request to OpenRouter...")
         
-        # Create client with headers
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key,
-            default_headers={
-                "HTTP-Referer": "https://github.com/yourusername/avatar-crew",
-                "X-Title": "Avatar-Crew Test"
-            }
-        )
+        client = get_client(api_key)
         
         # Make the API request with an available model
         response = client.chat.completions.create(
@@ -1,48 +1,83 @@
 """List available models from OpenRouter API."""
+import asyncio
 import os
-import requests
+from typing import Optional
+
+import httpx
+import ijson
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-def list_available_models():
+MODELS_URL = "https://openrouter.ai/api/v1/models"
+
+# Shared HTTP/2 client so repeated calls reuse the connection to OpenRouter.
+# httpx negotiates gzip (and brotli, when installed) on its own.
+_client: Optional[httpx.AsyncClient] = None
+
+
+class _AsyncStreamReader:
+    """Async file-like adapter that lets ijson read an httpx response stream."""
+
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.aiter_bytes()
+
+    async def read(self, size: int = -1) -> bytes:
+        return await anext(self._chunks, b"")
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(http2=True, timeout=10)
+    return _client
+
+
+async def list_available_models():
     """List available models from OpenRouter API."""
     api_key = os.getenv("OPENROUTER_API_KEY")
-    
+
     if not api_key:
         print("Error: OPENROUTER_API_KEY not found in environment variables")
         return
-    
+
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
     }
-    
+
     try:
-        response = requests.get(
-            "https://openrouter.ai/api/v1/models",
-            headers=headers,
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            models = response.json().get('data', [])
-            print("\nAvailable Models:")
-            print("-" * 50)
-            for model in models:
-                if model.get('pricing', {}).get('prompt') == "0" and model.get('pricing', {}).get('completion') == "0":
-                    print(f"ID: {model['id']}")
-                    print(f"Name: {model.get('name', 'N/A')}")
-                    print(f"Description: {model.get('description', 'N/A')}")
-                    print(f"Context Length: {model.get('context_length', 'N/A')}")
-                    print("-" * 50)
-        else:
-            print(f"Error: {response.status_code} - {response.text}")
-            
+        # Stream-parse the "data" array so only free models are ever materialized
+        async with _get_client().stream("GET", MODELS_URL, headers=headers) as response:
+            if response.status_code == 200:
+                print("\nAvailable Models:")
+                print("-" * 50)
+                async for model in ijson.items(_AsyncStreamReader(response), 'data.item'):
+                    if model.get('pricing', {}).get('prompt') == "0" and model.get('pricing', {}).get('completion') == "0":
+                        print(f"ID: {model['id']}")
+                        print(f"Name: {model.get('name', 'N/A')}")
+                        print(f"Description: {model.get('description', 'N/A')}")
+                        print(f"Context Length: {model.get('context_length', 'N/A')}")
+                        print("-" * 50)
+            else:
+                await response.aread()
+                print(f"Error: {response.status_code} - {response.text}")
+
     except Exception as e:
         print(f"Error: {str(e)}")
 
+
+async def main():
+    global _client
+    try:
+        await list_available_models()
+    finally:
+        if _client is not None:
+            await _client.aclose()
+            _client = None
+
 if __name__ == "__main__":
     print("Fetching available models from OpenRouter...")
-    list_available_models()
+    asyncio.run(main())
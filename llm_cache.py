@@ -0,0 +1,186 @@
+"""Response cache for LLM calls.
+
+Two tiers are supported:
+- an exact tier keyed by a SHA-256 of the request (model, messages, parameters)
+- an optional semantic tier that matches paraphrased prompts by the cosine
+  similarity of their embeddings (requires sentence-transformers)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    np = None
+    SentenceTransformer = None
+
+# Embedding model for the semantic tier; set LLM_CACHE_EMBED_MODEL="" to disable it
+DEFAULT_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Only (near-)deterministic requests are cached; sampled responses are meant to vary
+DEFAULT_MAX_TEMPERATURE = 0.2
+
+
+def make_key(**fields: Any) -> str:
+    """Build a stable cache key from the fields that determine a response."""
+    payload = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """In-process LRU cache of LLM responses with an optional semantic tier."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        similarity_threshold: float = 0.92,
+        embed_model: Optional[str] = None,
+        max_temperature: Optional[float] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached responses (LLM_CACHE_SIZE, default 1024)
+            ttl: Seconds a response stays valid (LLM_CACHE_TTL, default 3600)
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            embed_model: Sentence-transformers model for the semantic tier
+                (LLM_CACHE_EMBED_MODEL). The tier is disabled if the model name
+                is empty or sentence-transformers is not installed.
+            max_temperature: Requests sampled above this temperature bypass
+                alookup()/astore() entirely (LLM_CACHE_MAX_TEMPERATURE, default 0.2)
+        """
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_SIZE", "1024"))
+        self.ttl = ttl or float(os.getenv("LLM_CACHE_TTL", "3600"))
+        self.similarity_threshold = similarity_threshold
+        if embed_model is None:
+            embed_model = os.getenv("LLM_CACHE_EMBED_MODEL", DEFAULT_EMBED_MODEL)
+        self.embed_model = embed_model if SentenceTransformer is not None else ""
+        if max_temperature is None:
+            max_temperature = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", str(DEFAULT_MAX_TEMPERATURE)))
+        self.max_temperature = max_temperature
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # key -> (namespace, normalized embedding) for the semantic tier
+        self._vectors: Dict[str, Tuple[str, Any]] = {}
+        self._embedder = None
+        self._embedder_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return bool(self.embed_model)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for an exact key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, value: Any, text: Optional[str] = None, namespace: str = "",
+            vector: Any = None) -> None:
+        """Cache a value, indexing ``text`` for semantic lookups if enabled.
+
+        Args:
+            key: Exact-match key (see make_key)
+            value: The response to cache
+            text: Prompt text to embed for the semantic tier
+            namespace: Semantic matches are only made within the same namespace
+                (e.g. the model and generation parameters)
+            vector: Precomputed embedding of ``text`` (see embed), so it isn't embedded again
+        """
+        if vector is None and text and self.semantic_enabled:
+            vector = self.embed(text)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            if vector is not None:
+                self._vectors[key] = (namespace, vector)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def get_similar(self, text: str, namespace: str = "", vector: Any = None) -> Optional[Any]:
+        """Return the cached value whose prompt is most similar to ``text``."""
+        if not self.semantic_enabled:
+            return None
+        if vector is None:
+            vector = self.embed(text)
+        with self._lock:
+            keys = [k for k, (ns, _) in self._vectors.items() if ns == namespace]
+            if not keys:
+                return None
+            scores = np.stack([self._vectors[k][1] for k in keys]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            key = keys[best]
+        return self.get(key)
+
+    def cacheable(self, temperature: float) -> bool:
+        """Whether responses sampled at ``temperature`` should be cached at all."""
+        return temperature <= self.max_temperature
+
+    async def alookup(self, key: str, text: Optional[str] = None, namespace: str = "",
+                      temperature: float = 0.0) -> Tuple[Optional[Any], Any]:
+        """Exact lookup, falling back to a semantic lookup.
+
+        Returns (value, vector): ``vector`` is the embedding of ``text`` computed
+        for the semantic lookup, or None; pass it to astore() on a miss so the
+        prompt isn't embedded twice. Returns (None, None) without looking
+        anything up above ``max_temperature``. Embedding runs in a worker thread
+        so the event loop isn't blocked.
+        """
+        if not self.cacheable(temperature):
+            return None, None
+        value = self.get(key)
+        vector = None
+        if value is None and text and self.semantic_enabled:
+            value, vector = await asyncio.to_thread(self._lookup_similar, text, namespace)
+        return value, vector
+
+    async def astore(self, key: str, value: Any, text: Optional[str] = None, namespace: str = "",
+                     temperature: float = 0.0, vector: Any = None) -> None:
+        """Async counterpart of put(); embedding runs in a worker thread.
+
+        Nothing is stored (or embedded) above ``max_temperature``.
+        """
+        if not self.cacheable(temperature):
+            return
+        if text and self.semantic_enabled and vector is None:
+            await asyncio.to_thread(self.put, key, value, text, namespace)
+        else:
+            self.put(key, value, text, namespace, vector)
+
+    def _lookup_similar(self, text: str, namespace: str) -> Tuple[Optional[Any], Any]:
+        vector = self.embed(text)
+        return self.get_similar(text, namespace, vector), vector
+
+    def _evict(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._vectors.pop(key, None)
+
+    def embed(self, text: str):
+        """Normalized embedding of ``text``, loading the model on first use."""
+        if self._embedder is None:
+            with self._embedder_lock:
+                if self._embedder is None:
+                    logger.info(f"Loading cache embedding model: {self.embed_model}")
+                    self._embedder = SentenceTransformer(self.embed_model)
+        return self._embedder.encode(text, normalize_embeddings=True)
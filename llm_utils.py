@@ -6,12 +6,17 @@ like OpenAI and Kimi K2.
 """
 
 import os
-from typing import Optional, Dict, Any, Union
+import functools
+from typing import Callable, Optional, Dict, Any, Union
 import logging
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+# Config keys consumed explicitly by each factory; everything else is passed through
+_OPENAI_EXCLUDED = frozenset({"model_name", "temperature", "api_key"})
+_KIMI_EXCLUDED = _OPENAI_EXCLUDED | {"base_url"}
+
 class LLMProvider(Enum):
     """Supported LLM providers."""
     OPENAI = "openai"
@@ -78,13 +83,11 @@ def get_llm(config: Optional[LLMConfig] = None, **kwargs):
     config.config.update(kwargs)
     
     try:
-        if config.provider == LLMProvider.OPENAI:
-            return _get_openai_llm(config)
-        elif config.provider == LLMProvider.KIMI:
-            return _get_kimi_llm(config)
-        else:
+        factory = _DISPATCH.get(config.provider)
+        if factory is None:
             logger.warning(f"Unknown LLM provider: {config.provider}. Using mock LLM.")
-            return _get_mock_llm(config)
+            factory = _get_mock_llm
+        return factory(config)
             
     except ImportError as e:
         logger.error(f"Failed to initialize {config.provider} LLM: {e}")
@@ -95,17 +98,35 @@ def get_llm(config: Optional[LLMConfig] = None, **kwargs):
         raise
 
 
+def _cached_build(builder: Callable, config: LLMConfig):
+    """Call an lru_cached builder with the config frozen into a hashable tuple.
+    
+    Configs with unhashable values (e.g. nested dicts) bypass the cache.
+    """
+    settings = tuple(sorted(config.config.items()))
+    try:
+        hash(settings)
+    except TypeError:
+        return builder.__wrapped__(settings)
+    return builder(settings)
+
+
 def _get_openai_llm(config: LLMConfig):
-    """Get an OpenAI LLM instance."""
+    """Get an OpenAI LLM instance (shared between identical configs)."""
+    return _cached_build(_build_openai_llm, config)
+
+
+@functools.lru_cache(maxsize=16)
+def _build_openai_llm(settings: tuple):
+    config = dict(settings)
     try:
         from langchain.chat_models import ChatOpenAI
         
         return ChatOpenAI(
-            model_name=config.config["model_name"],
-            temperature=config.config["temperature"],
-            openai_api_key=config.config["api_key"],
-            **{k: v for k, v in config.config.items() 
-               if k not in ["model_name", "temperature", "api_key"]}
+            model_name=config["model_name"],
+            temperature=config["temperature"],
+            openai_api_key=config["api_key"],
+            **{k: v for k, v in config.items() if k not in _OPENAI_EXCLUDED}
         )
     except ImportError as e:
         logger.error("OpenAI not installed. Please install it with: pip install openai")
@@ -113,23 +134,28 @@ def _get_openai_llm(config: LLMConfig):
 
 
 def _get_kimi_llm(config: LLMConfig):
-    """Get a Kimi K2 LLM instance using OpenRouter."""
+    """Get a Kimi K2 LLM instance using OpenRouter (shared between identical configs)."""
+    return _cached_build(_build_kimi_llm, config)
+
+
+@functools.lru_cache(maxsize=16)
+def _build_kimi_llm(settings: tuple):
+    config = dict(settings)
     try:
         from openai import OpenAI
         from langchain.chat_models import ChatOpenAI
         
         # Get configuration with defaults
-        api_key = config.config.get("api_key") or os.getenv("KIMI_API_KEY")
-        base_url = config.config.get("base_url") or os.getenv("KIMI_BASE_URL", "https://openrouter.ai/api/v1")
-        model_name = config.config.get("model_name") or os.getenv("KIMI_MODEL", "moonshotai/kimi-k2:free")
+        api_key = config.get("api_key") or os.getenv("KIMI_API_KEY")
+        base_url = config.get("base_url") or os.getenv("KIMI_BASE_URL", "https://openrouter.ai/api/v1")
+        model_name = config.get("model_name") or os.getenv("KIMI_MODEL", "moonshotai/kimi-k2:free")
         
         if not api_key:
             raise ValueError("Kimi K2 API key not provided. Set KIMI_API_KEY in environment or pass api_key in config.")
         
-        print(f"Configuring Kimi K2 via OpenRouter:")
-        print(f"  - Model: {model_name}")
-        print(f"  - Base URL: {base_url}")
-        print(f"  - API Key: {api_key[:8]}...{api_key[-4:]}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Configuring Kimi K2 via OpenRouter: model=%s base_url=%s api_key=%s",
+                        model_name, base_url, f"{api_key[:8]}...{api_key[-4:]}")
         
         # Create a custom client for OpenRouter
         client = OpenAI(
@@ -141,9 +167,8 @@ def _get_kimi_llm(config: LLMConfig):
         return ChatOpenAI(
             client=client,
             model=model_name,
-            temperature=config.config.get("temperature", 0.7),
-            **{k: v for k, v in config.config.items() 
-               if k not in ["model_name", "temperature", "api_key", "base_url"]}
+            temperature=config.get("temperature", 0.7),
+            **{k: v for k, v in config.items() if k not in _KIMI_EXCLUDED}
         )
     except ImportError as e:
         logger.error("OpenAI package required for Kimi K2 integration. Install with: pip install openai")
@@ -152,13 +177,28 @@ def _get_kimi_llm(config: LLMConfig):
 
 def _get_mock_llm(config: LLMConfig):
     """Get a mock LLM instance for testing."""
+    return _cached_build(_build_mock_llm, config)
+
+
+@functools.lru_cache(maxsize=16)
+def _build_mock_llm(settings: tuple):
+    config = dict(settings)
+    
     class MockLLM:
         def __init__(self, *args, **kwargs):
-            self.model_name = config.config.get("model_name", "mock-llm")
-            self.temperature = config.config.get("temperature", 0.7)
+            self.model_name = config.get("model_name", "mock-llm")
+            self.temperature = config.get("temperature", 0.7)
             
         def __call__(self, prompt, **kwargs):
             logger.info(f"Mock LLM received prompt: {prompt[:200]}...")
             return "This is a mock response from the test LLM. The actual workflow would use a real LLM in production."
     
     return MockLLM()
+
+
+# Provider -> factory; unknown providers fall back to the mock LLM
+_DISPATCH = {
+    LLMProvider.OPENAI: _get_openai_llm,
+    LLMProvider.KIMI: _get_kimi_llm,
+    LLMProvider.MOCK: _get_mock_llm,
+}
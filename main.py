@@ -1,15 +1,141 @@
 import os
-from fastapi import FastAPI, HTTPException, Depends
+import json
+import random
+import asyncio
+import logging
+import traceback
+from contextlib import asynccontextmanager
+import httpx
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from typing import List, Dict, Any, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
 from openrouter_client import OpenRouterClient
 
-app = FastAPI(title="Avatar-Crew API", version="0.1.0")
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SampleFilter(logging.Filter):
+    """Keeps only a random fraction of INFO records; other levels always pass."""
+    
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno != logging.INFO or random.random() < self.rate
+
 
-# Initialize OpenRouter client
-def get_openrouter_client():
-    return OpenRouterClient()
+# Per-request OpenRouter INFO logs are noisy under load; keep a 10% sample.
+# Registered once at import so lifespan restarts (tests, reloads) don't stack filters.
+logging.getLogger("openrouter_client").addFilter(SampleFilter(float(os.getenv("OPENROUTER_LOG_SAMPLE_RATE", "0.1"))))
+
+
+class LazyStr:
+    """Defers building a log argument until a handler actually formats it."""
+    
+    __slots__ = ("_func",)
+    
+    def __init__(self, func):
+        self._func = func
+    
+    def __str__(self) -> str:
+        return self._func()
+
+
+# Seconds each startup connection warm-up may take
+WARM_UP_TIMEOUT = 2.0
+
+
+async def warm_up_connections(http_client: httpx.AsyncClient, ollama_client, weaviate_client=None) -> None:
+    """Open pooled connections to the upstream APIs so the first request skips the handshakes.
+
+    Each check gets a short timeout and no retries, so an unreachable upstream
+    can't hold up startup.
+    """
+    checks = [
+        http_client.head("https://openrouter.ai/api/v1/models", timeout=WARM_UP_TIMEOUT),
+        ollama_client.with_options(max_retries=0, timeout=WARM_UP_TIMEOUT).models.list(),
+    ]
+    if weaviate_client is not None:
+        # The worker thread may outlive the timeout, but startup no longer waits on it
+        checks.append(asyncio.wait_for(asyncio.to_thread(weaviate_client.is_ready), WARM_UP_TIMEOUT))
+    results = await asyncio.gather(*checks, return_exceptions=True)
+    for name, result in zip(["OpenRouter", "Ollama", "Weaviate"], results):
+        if isinstance(result, Exception):
+            logger.warning("Connection warm-up failed for %s: %r", name, result)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients once at startup and close them on shutdown."""
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=100,
+            keepalive_expiry=30.0
+        )
+    )
+    app.state.http_client = http_client
+    try:
+        app.state.openrouter_client = OpenRouterClient(http_client=http_client)
+    except ValueError as e:
+        logger.warning("OpenRouter client not available: %s", e)
+        app.state.openrouter_client = None
+    try:
+        app.state.weaviate = await asyncio.to_thread(get_weaviate_client)
+    except Exception as e:
+        logger.warning("Weaviate not available at startup: %s", e)
+        app.state.weaviate = None
+    # Pooled OpenAI-compatible client for the RAG answer model (Ollama)
+    app.state.ollama = make_ollama_client()
+    # Load the optional local query embedder before the first request
+    # (a model that fails to load is logged and RAG falls back to near_text)
+    await asyncio.to_thread(get_embedder)
+    await warm_up_connections(http_client, app.state.ollama, app.state.weaviate)
+    
+    yield
+    
+    await asyncio.to_thread(close_weaviate_client)
+    await app.state.ollama.close()
+    await close_voice_session()
+    # Disconnect the workflow context pool, then terminate the shared Chromium
+    # process launched on first browser use
+    await context_pool.shutdown()
+    await browser_pool.shutdown()
+    await http_client.aclose()
+
+
+app = FastAPI(
+    title="Avatar-Crew API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+# Shared OpenRouter client created in the lifespan; async so FastAPI resolves
+# it on the event loop instead of dispatching it to the threadpool
+async def get_openrouter_client(request: Request) -> OpenRouterClient:
+    client = request.app.state.openrouter_client
+    if client is None:
+        raise HTTPException(status_code=503, detail="OpenRouter API key not configured")
+    return client
+
+async def get_ollama(request: Request):
+    return request.app.state.ollama
+
+async def get_weaviate(request: Request):
+    """Shared Weaviate client; connects lazily if it was down at startup."""
+    client = request.app.state.weaviate
+    if client is None:
+        try:
+            client = request.app.state.weaviate = await asyncio.to_thread(get_weaviate_client)
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Weaviate not available: {str(e)}")
+    return client
 
 # Pydantic models
 class ChatRequest(BaseModel):
@@ -23,19 +149,47 @@ class ChatRequest(BaseModel):
     max_tokens: int = 300
 
 class ChatResponse(BaseModel):
+    # "model_used" would otherwise clash with pydantic's protected "model_" namespace
+    model_config = ConfigDict(protected_namespaces=())
+    
     success: bool
     content: str = ""
     model_used: str = ""
     error: str = ""
 
-# Chat endpoint
-import logging
-import traceback
+class NavigateRequest(BaseModel):
+    # Plain str rather than HttpUrl: navigate() adds a missing scheme itself
+    url: str = Field(min_length=1)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+class ClickRequest(BaseModel):
+    selector: str = Field(min_length=1)
+    timeout: Optional[int] = Field(None, gt=0)  # milliseconds
+
+class TypeRequest(BaseModel):
+    selector: str = Field(min_length=1)
+    text: str
+
+class BrowserOp(BaseModel):
+    action: Literal["type", "click"]
+    selector: str = Field(min_length=1)
+    text: Optional[str] = None  # required for "type"
+    timeout: Optional[int] = Field(None, gt=0)  # milliseconds, "click" only
 
+class BrowserBatchRequest(BaseModel):
+    ops: List[BrowserOp] = Field(min_length=1)
+
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest] = Field(min_length=1, max_length=100)
+    max_concurrency: int = Field(20, ge=1, le=100)
+
+class BatchChatResponse(BaseModel):
+    results: List[ChatResponse]
+
+class RagBatchQueryRequest(BaseModel):
+    questions: List[str] = Field(min_length=1, max_length=100)
+    max_concurrency: int = Field(8, ge=1, le=32)
+
+# Chat endpoint
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(
     request: ChatRequest,
@@ -43,24 +197,24 @@ async def chat_endpoint(
 ):
     """Chat with the AI using OpenRouter's free models."""
     try:
-        logger.info(f"Received chat request with model: {request.model}")
-        logger.debug(f"Full request: {request.dict()}")
+        logger.info("Received chat request with model: %s", request.model)
+        logger.debug("Full request: %s", LazyStr(request.model_dump_json))
         
-        response = client.chat(
+        response = await client.chat(
             message=request.message,
             model=request.model,
-            fallback_models=request.fallback_models,
+            fallbacks=request.fallback_models,
             temperature=request.temperature,
             max_tokens=request.max_tokens,
             app_name="Avatar-Crew",
             app_url="https://github.com/yourusername/avatar-crew"
         )
         
-        logger.info(f"OpenRouter response: {response.get('success', False)}")
+        logger.info("OpenRouter response: %s", response.get("success", False))
         
         if not response.get("success"):
             error_msg = response.get("error", "Unknown error from OpenRouter")
-            logger.error(f"OpenRouter error: {error_msg}")
+            logger.error("OpenRouter error: %s", error_msg)
             return ChatResponse(
                 success=False,
                 error=error_msg,
@@ -75,7 +229,7 @@ async def chat_endpoint(
         
     except Exception as e:
         error_msg = f"Unexpected error: {str(e)}"
-        logger.error(f"Error in chat endpoint: {error_msg}")
+        logger.error("Error in chat endpoint: %s", error_msg)
         logger.error(traceback.format_exc())
         
         return ChatResponse(
@@ -84,6 +238,82 @@ async def chat_endpoint(
             model_used="none"
         )
 
+# Streaming chat endpoint (Server-Sent Events)
+@app.post("/chat/stream")
+async def chat_stream_endpoint(
+    request: ChatRequest,
+    client: OpenRouterClient = Depends(get_openrouter_client)
+):
+    """Stream the reply as SSE: one JSON {"content": ...} event per delta, then [DONE]."""
+    logger.info("Received streaming chat request with model: %s", request.model)
+    response = await client.chat(
+        message=request.message,
+        model=request.model,
+        fallbacks=request.fallback_models,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens,
+        stream=True,
+        app_name="Avatar-Crew",
+        app_url="https://github.com/yourusername/avatar-crew"
+    )
+    
+    async def events():
+        if not response.get("success"):
+            error_msg = response.get("error", "Unknown error from OpenRouter")
+            logger.error("OpenRouter error: %s", error_msg)
+            yield f"data: {json.dumps({'error': error_msg})}\n\n"
+            return
+        yield f"data: {json.dumps({'model_used': response['model_used']})}\n\n"
+        try:
+            async for delta in response["stream"]:
+                yield f"data: {json.dumps({'content': delta})}\n\n"
+        except Exception as e:
+            logger.error("Error while streaming chat response: %s", e)
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            return
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+# Batch chat endpoint
+@app.post("/chat_batch", response_model=BatchChatResponse)
+async def chat_batch_endpoint(
+    request: BatchChatRequest,
+    client: OpenRouterClient = Depends(get_openrouter_client)
+):
+    """Run many chat requests concurrently; results keep the input order."""
+    logger.info("Received batch chat request with %d items", len(request.items))
+    semaphore = asyncio.Semaphore(request.max_concurrency)
+    
+    async def one(item: ChatRequest) -> Dict[str, Any]:
+        async with semaphore:
+            return await client.chat(
+                message=item.message,
+                model=item.model,
+                fallbacks=item.fallback_models,
+                temperature=item.temperature,
+                max_tokens=item.max_tokens,
+                app_name="Avatar-Crew",
+                app_url="https://github.com/yourusername/avatar-crew"
+            )
+    
+    responses = await asyncio.gather(*map(one, request.items), return_exceptions=True)
+    
+    results = []
+    for response in responses:
+        if isinstance(response, Exception):
+            logger.error("Error in batch chat item: %s", response)
+            results.append(ChatResponse(success=False, error=f"Unexpected error: {str(response)}", model_used="none"))
+        elif not response.get("success"):
+            results.append(ChatResponse(
+                success=False,
+                error=response.get("error", "Unknown error from OpenRouter"),
+                model_used=response.get("model_used", "none")
+            ))
+        else:
+            results.append(ChatResponse(success=True, content=response["content"], model_used=response["model_used"]))
+    return BatchChatResponse(results=results)
+
 # Allow local Vite dev server during development
 origins = [
     "http://localhost:5173",
@@ -94,8 +324,9 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Explicit lists let Starlette use its precomputed preflight headers
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization", "Accept"],
 )
 
 
@@ -115,9 +346,11 @@ async def list_dummy_agents():
     }
 
 from crew_workflow import run_avatar_workflow
-from rag_utils import rag_query
-from voice_utils import tts, lip_sync
-from browser_agent import browser_agent
+from rag_utils import (
+    make_ollama_client, rag_query, rag_batch_query, get_embedder, get_weaviate_client, close_weaviate_client
+)
+from voice_utils import tts, lip_sync, close_session as close_voice_session
+from browser_agent import browser_agent, browser_pool, context_pool
 from fastapi.responses import JSONResponse, HTMLResponse
 
 # TODO: Integrate CrewAI and real workflows
@@ -133,18 +366,35 @@ async def run_workflow(payload: dict):
 
 
 @app.post("/rag_query")
-async def rag_query_endpoint(payload: dict):
+async def rag_query_endpoint(payload: dict, ollama=Depends(get_ollama), weaviate_client=Depends(get_weaviate)):
     """Answer a question using RAG (Weaviate + Ollama)"""
     question = payload.get("question", "")
-    return rag_query(question)
+    return await rag_query(ollama, question, weaviate_client=weaviate_client)
+
+
+@app.post("/rag_batch_query")
+async def rag_batch_query_endpoint(request: RagBatchQueryRequest, ollama=Depends(get_ollama),
+                                   weaviate_client=Depends(get_weaviate)):
+    """Answer several questions using RAG, embedding them in one batch.
+    Expected JSON: { "questions": ["...", "..."], "max_concurrency": 8 }
+    """
+    return {"results": await rag_batch_query(ollama, request.questions, weaviate_client=weaviate_client,
+                                             max_concurrency=request.max_concurrency)}
 
 
 @app.post("/tts")
-async def tts_endpoint(payload: dict):
-    """Generate speech audio (base64) from text using ElevenLabs."""
+async def tts_endpoint(payload: dict, request: Request):
+    """Generate speech audio (base64) from text using ElevenLabs.
+    Send "Accept: audio/mpeg" to get the raw MP3 instead of base64 JSON.
+    """
     text = payload.get("text", "")
     voice_id = payload.get("voice_id", "Rachel")
-    return tts(text, voice_id)
+    if "audio/mpeg" in request.headers.get("accept", ""):
+        result = await tts(text, voice_id, encode=False)
+        if "audio" in result:
+            return Response(content=result["audio"], media_type="audio/mpeg")
+        return result
+    return await tts(text, voice_id)
 
 
 @app.post("/lip_sync")
@@ -152,7 +402,7 @@ async def lip_sync_endpoint(payload: dict):
     """Generate lip-synced video URL using D-ID."""
     audio_b64 = payload.get("audio_base64", "")
     image_url = payload.get("image_url", "")
-    return lip_sync(audio_b64, image_url)
+    return await lip_sync(audio_b64, image_url)
 
 
 # Browser automation endpoints
@@ -163,40 +413,49 @@ async def start_browser():
     return result
 
 @app.post("/browser/navigate")
-async def navigate_to_url(request: dict):
+async def navigate_to_url(request: NavigateRequest):
     """Navigate to a URL with error handling."""
-    url = request.get("url")
-    if not url:
-        raise HTTPException(status_code=400, detail="URL is required")
     try:
-        return await browser_agent.navigate(url)
+        return await browser_agent.navigate(request.url)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/browser/click")
-async def click_element(request: dict):
+async def click_element(request: ClickRequest):
     """Click an element matching the selector with timeout."""
-    selector = request.get("selector")
-    timeout = request.get("timeout", 30000)  # Default 30 seconds
-    if not selector:
-        raise HTTPException(status_code=400, detail="Selector is required")
     try:
-        return await browser_agent.click(selector)
+        return await browser_agent.click(request.selector, timeout=request.timeout)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/browser/type")
-async def type_text(request: dict):
+async def type_text(request: TypeRequest):
     """Type text into an input field with validation."""
-    selector = request.get("selector")
-    text = request.get("text")
-    if not selector or text is None:
-        raise HTTPException(status_code=400, detail="Selector and text are required")
     try:
-        return await browser_agent.type_text(selector, text)
+        return await browser_agent.type_text(request.selector, request.text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/browser/batch")
+async def run_browser_batch(request: BrowserBatchRequest):
+    """Run several click/type operations on the current page in one request.
+    Ops run one at a time: fill/click act on the page's focused element, so
+    concurrent ops could send one field's text into another.
+    Results are returned in the order of the ops.
+    """
+    async def run_op(op: BrowserOp) -> Dict[str, Any]:
+        if op.action == "type":
+            if op.text is None:
+                return {"error": f"Text is required to type into: {op.selector}"}
+            return await browser_agent.type_text(op.selector, op.text)
+        return await browser_agent.click(op.selector, timeout=op.timeout)
+    
+    try:
+        results = [await run_op(op) for op in request.ops]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"results": results}
+
 @app.get("/browser/content")
 async def get_page_content():
     """Get the current page content with error handling."""
@@ -206,13 +465,31 @@ async def get_page_content():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/browser/screenshot")
-async def take_screenshot():
-    """Take a screenshot of the current page with error handling."""
+async def take_screenshot(request: Request):
+    """Take a screenshot of the current page with error handling.
+    Send "Accept: image/png" to get the raw PNG instead of base64 JSON.
+    """
     try:
+        if "image/png" in request.headers.get("accept", ""):
+            result = await browser_agent.take_screenshot(encode=False)
+            if "screenshot_bytes" in result:
+                return Response(content=result["screenshot_bytes"], media_type="image/png")
+            return result
         return await browser_agent.take_screenshot()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/browser/screenshot_raw")
+async def take_screenshot_raw():
+    """Take a screenshot and return the PNG bytes directly (no base64)."""
+    try:
+        result = await browser_agent.take_screenshot(encode=False)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if "screenshot_bytes" not in result:
+        raise HTTPException(status_code=500, detail=result.get("error", "Screenshot failed"))
+    return Response(content=result["screenshot_bytes"], media_type="image/png")
+
 @app.post("/browser/close")
 async def close_browser():
     """Close the browser instance with error handling."""
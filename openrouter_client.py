@@ -2,26 +2,41 @@
 import os
 import sys
 import json
-from typing import Dict, Any, List, Optional
-from openai import OpenAI, APIError, APIConnectionError, RateLimitError
+import asyncio
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import httpx
+from openai import AsyncOpenAI, APIError, APIConnectionError, RateLimitError
+
+from llm_cache import LLMCache, make_key
 
 # Enable debug logging
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_APP_URL = "https://github.com/yourusername/avatar-crew"
+DEFAULT_APP_NAME = "Avatar-Crew"
+# Shared by every request that doesn't override app_url/app_name
+DEFAULT_EXTRA_HEADERS = {"HTTP-Referer": DEFAULT_APP_URL, "X-Title": DEFAULT_APP_NAME}
+
 class OpenRouterClient:
     """Client for OpenRouter API with model fallback support."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None,
+                 cache: Optional[LLMCache] = None):
         """Initialize the OpenRouter client.
         
         Args:
             api_key: Optional OpenRouter API key. If not provided, will try to load from OPENROUTER_API_KEY env var.
+            http_client: Optional shared httpx.AsyncClient (e.g. created in the app lifespan).
+                If not provided, the client creates and owns its own connection pool.
+            cache: Optional response cache. Defaults to a new in-process LLMCache.
         """
         logger.info("Initializing OpenRouter client...")
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
-        logger.info(f"Using API key: {'*' * 8 + self.api_key[-4:] if self.api_key else 'None'}")
+        # Masked once for logging so the key is never sliced per log call
+        self._api_key_masked = f"{'*' * 8}{self.api_key[-4:]}" if self.api_key else "None"
+        logger.info("Using API key: %s", self._api_key_masked)
         
         if not self.api_key:
             error_msg = "OpenRouter API key not provided and OPENROUTER_API_KEY environment variable not set"
@@ -30,11 +45,27 @@ class OpenRouterClient:
             
         logger.info("OpenRouter client initialized successfully")
         
-        self.client = OpenAI(
+        # One client for all requests and fallbacks, so the connection pool and
+        # TLS sessions are reused; OpenRouter headers are sent per request
+        self._owns_http_client = http_client is None
+        self._http_client = http_client or httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=100,
+                keepalive_expiry=30.0
+            )
+        )
+        self.client = AsyncOpenAI(
             base_url="https://openrouter.ai/api/v1",
-            api_key=self.api_key
+            api_key=self.api_key,
+            http_client=self._http_client
         )
         
+        # Repeated and paraphrased prompts skip the API (low temperatures only)
+        self.cache = cache or LLMCache()
+        # Cache key -> task for requests currently in flight
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
         # Default free models to try in order
         self.free_models = [
             "meta-llama/llama-3.3-70b-instruct:free",
@@ -42,70 +73,177 @@ class OpenRouterClient:
             "google/gemma-2-9b-it:free"
         ]
     
-    def chat(self, message: str, model: str = None, fallbacks: List[str] = None, **kwargs) -> Dict[str, Any]:
-        """Chat with fallback support."""
-        models = [model] if model else self.free_models
+    async def aclose(self) -> None:
+        """Close the HTTP connection pool if this client created it."""
+        if self._owns_http_client:
+            await self._http_client.aclose()
+    
+    @staticmethod
+    def _extra_headers(app_url: Optional[str], app_name: Optional[str]) -> Dict[str, str]:
+        """OpenRouter attribution headers; the default dict is reused as-is."""
+        app_url = app_url or DEFAULT_APP_URL
+        app_name = app_name or DEFAULT_APP_NAME
+        if app_url == DEFAULT_APP_URL and app_name == DEFAULT_APP_NAME:
+            return DEFAULT_EXTRA_HEADERS
+        return {"HTTP-Referer": app_url, "X-Title": app_name}
+    
+    async def _try_model(self, model_name: str, **request) -> Tuple[str, Any, Optional[str]]:
+        """Request a completion from one model.
+        
+        Returns:
+            (model_name, response, error) - response is None if the call failed
+        """
+        try:
+            logger.info("Trying model: %s", model_name)
+            response = await self.client.chat.completions.create(model=model_name, **request)
+            logger.info("Successfully got response from %s", model_name)
+            return model_name, response, None
+            
+        except RateLimitError as e:
+            error = f"Rate limit exceeded for {model_name}: {str(e)}"
+            logger.warning(error)
+            
+        except APIConnectionError as e:
+            error = f"API connection error with {model_name}: {str(e)}"
+            logger.error(error)
+            
+        except APIError as e:
+            error = f"API error with {model_name}: {str(e)}"
+            logger.error(error)
+            
+        except Exception as e:
+            error = f"Unexpected error with {model_name}: {str(e)}"
+            logger.error(error, exc_info=True)
+        
+        return model_name, None, error
+    
+    async def _stream_content(self, response, model_name: str, cache_key: str,
+                              message: str, cache_namespace: str, temperature: float,
+                              cache_vector: Any) -> AsyncIterator[str]:
+        """Yield content deltas from a streamed completion, caching the full text at the end."""
+        parts = []
+        try:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        finally:
+            await response.close()
+        result = {"success": True, "content": "".join(parts), "model_used": model_name}
+        await self.cache.astore(cache_key, result, message, cache_namespace, temperature, cache_vector)
+    
+    @staticmethod
+    async def _replay(content: str) -> AsyncIterator[str]:
+        yield content
+    
+    async def chat(self, message: str, model: str = None, fallbacks: List[str] = None,
+                   stream: bool = False, **kwargs) -> Dict[str, Any]:
+        """Chat with fallback support.
+        
+        The first ``parallel_fallbacks`` models (default 2) are tried concurrently
+        and the first success wins; the remaining models are tried in order only
+        if all of those fail.
+        
+        With ``stream=True`` models are tried one at a time until a stream opens,
+        and the result's "stream" key is an async iterator of content deltas.
+        """
+        models = [model] if model else list(self.free_models)
         if fallbacks:
             models.extend(fallbacks)
         
+        messages = [{"role": "user", "content": message}]
+        temperature = kwargs.get("temperature", 0.7)
+        max_tokens = kwargs.get("max_tokens", 300)
+        
+        cache_key = make_key(model=models, messages=messages, temperature=temperature, max_tokens=max_tokens)
+        # Semantic matches are only made between requests with the same parameters
+        cache_namespace = make_key(model=models, temperature=temperature, max_tokens=max_tokens)
+        # The prompt embedding from a semantic miss is reused when the response is stored
+        cached, cache_vector = await self.cache.alookup(cache_key, message, cache_namespace, temperature)
+        if cached is not None:
+            logger.info("Serving response from cache")
+            if stream:
+                return {**cached, "model_used": "cache", "stream": self._replay(cached["content"])}
+            return {**cached, "model_used": "cache"}
+        
+        request = {
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "extra_headers": self._extra_headers(kwargs.get("app_url"), kwargs.get("app_name"))
+        }
+        parallel_fallbacks = kwargs.get("parallel_fallbacks", 2)
+        
+        if stream:
+            return await self._complete(models, request, parallel_fallbacks, True,
+                                        message, cache_key, cache_namespace, cache_vector)
+        
+        # Single-flight: identical concurrent prompts share one upstream request.
+        # The task is shielded so a cancelled caller doesn't cancel it for the others.
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._complete(models, request, parallel_fallbacks, False,
+                                                      message, cache_key, cache_namespace, cache_vector))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        else:
+            logger.info("Joining in-flight request for an identical prompt")
+        return dict(await asyncio.shield(task))
+    
+    async def _complete(self, models: List[str], request: Dict[str, Any], parallel_fallbacks: int,
+                        stream: bool, message: str, cache_key: str, cache_namespace: str,
+                        cache_vector: Any = None) -> Dict[str, Any]:
+        """Run the model fallback chain for a request that missed the cache."""
+        if stream:
+            request["stream"] = True
+        # Never race streams: the losing stream would hold a connection open
+        parallel = 1 if stream else max(1, parallel_fallbacks)
+        
         last_error = None
+        response = None
+        
+        # Race the first candidates so a rate-limited model doesn't hold up the next one
+        tasks = [asyncio.create_task(self._try_model(m, **request)) for m in models[:parallel]]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                model_name, response, error = await next_done
+                if response is not None:
+                    break
+                last_error = error
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let the losers finish cancelling so their connections are released
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if response is None:
+            for model_name in models[parallel:]:
+                model_name, response, error = await self._try_model(model_name, **request)
+                if response is not None:
+                    break
+                last_error = error
+        
+        if response is None:
+            return {
+                "success": False, 
+                "error": last_error or "All models failed",
+                "models_tried": models
+            }
+        
+        if stream:
+            return {
+                "success": True,
+                "model_used": model_name,
+                "stream": self._stream_content(response, model_name, cache_key, message,
+                                               cache_namespace, request["temperature"], cache_vector)
+            }
         
-        for model_name in models:
-            try:
-                logger.info(f"Trying model: {model_name}")
-                
-                # Prepare extra headers for OpenRouter
-                extra_headers = {
-                    "HTTP-Referer": kwargs.get("app_url", "https://github.com/yourusername/avatar-crew"),
-                    "X-Title": kwargs.get("app_name", "Avatar-Crew")
-                }
-                
-                # Create a new client with the extra headers
-                client = OpenAI(
-                    base_url="https://openrouter.ai/api/v1",
-                    api_key=self.api_key,
-                    default_headers=extra_headers
-                )
-                
-                # Make the API request
-                response = client.chat.completions.create(
-                    model=model_name,
-                    messages=[{"role": "user", "content": message}],
-                    temperature=kwargs.get("temperature", 0.7),
-                    max_tokens=kwargs.get("max_tokens", 300)
-                )
-                
-                logger.info(f"Successfully got response from {model_name}")
-                
-                return {
-                    "success": True,
-                    "content": response.choices[0].message.content,
-                    "model_used": model_name,
-                    "full_response": response
-                }
-                
-            except RateLimitError as e:
-                last_error = f"Rate limit exceeded for {model_name}: {str(e)}"
-                logger.warning(last_error)
-                continue
-                
-            except APIConnectionError as e:
-                last_error = f"API connection error with {model_name}: {str(e)}"
-                logger.error(last_error)
-                continue
-                
-            except APIError as e:
-                last_error = f"API error with {model_name}: {str(e)}"
-                logger.error(last_error)
-                continue
-                
-            except Exception as e:
-                last_error = f"Unexpected error with {model_name}: {str(e)}"
-                logger.error(last_error, exc_info=True)
-                continue
-        
-        return {
-            "success": False, 
-            "error": last_error or "All models failed",
-            "models_tried": models
+        result = {
+            "success": True,
+            "content": response.choices[0].message.content,
+            "model_used": model_name,
+            "full_response": response
         }
+        await self.cache.astore(cache_key, result, message, cache_namespace, request["temperature"],
+                                cache_vector)
+        return result
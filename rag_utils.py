@@ -1,43 +1,142 @@
 """Utility functions for RAG using Weaviate + Ollama/OpenAI-compatible LLM."""
 
 import os
-from typing import List
+import asyncio
+import logging
+import threading
+from typing import List, Optional
+from urllib.parse import urlparse
 
+import httpx
 import weaviate
-import openai
+from openai import AsyncOpenAI
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+from llm_cache import LLMCache, make_key
+
+logger = logging.getLogger(__name__)
 
 # Configure from env vars or defaults
 WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://localhost:8080")
+WEAVIATE_GRPC_PORT = int(os.getenv("WEAVIATE_GRPC_PORT", "50051"))
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama3")  # or "kimi", etc.
-# Configure OpenAI-compatible client (Ollama)
-openai.api_key = "ollama"  # any string when hitting local Ollama server
-openai.api_base = f"{OLLAMA_BASE_URL}/v1"
+# Sampling temperature for answers; above LLM_CACHE_MAX_TEMPERATURE answers aren't cached
+RAG_TEMPERATURE = float(os.getenv("RAG_TEMPERATURE", "0"))
+# Optional local query embedder (e.g. "sentence-transformers/all-MiniLM-L6-v2").
+# Only set this if it matches the vectorizer the Document collection was indexed with.
+RAG_EMBED_MODEL = os.getenv("RAG_EMBED_MODEL", "")
+# "torch" or "onnx"; onnx also needs `pip install "sentence-transformers[onnx]"`
+RAG_EMBED_BACKEND = os.getenv("RAG_EMBED_BACKEND", "torch")
+RAG_EMBED_ONNX_FILE = os.getenv("RAG_EMBED_ONNX_FILE", "")  # e.g. "onnx/model_qint8_avx512_vnni.onnx"
+
+_client: weaviate.WeaviateClient | None = None
+_client_lock = threading.Lock()
+_embedder = None
+_embedder_failed = False
+_embedder_lock = threading.Lock()
+
+# At RAG_TEMPERATURE answers are deterministic enough per (question, retrieved chunks) to reuse
+_answer_cache = LLMCache(embed_model="")
+
+def make_ollama_client(http_client: Optional[httpx.AsyncClient] = None) -> AsyncOpenAI:
+    """Create the OpenAI-compatible client for Ollama (create once and share it)."""
+    return AsyncOpenAI(
+        base_url=f"{OLLAMA_BASE_URL}/v1",
+        api_key="ollama",  # any string when hitting local Ollama server
+        http_client=http_client or httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60)
+        ),
+    )
 
-_client: weaviate.Client | None = None
 
-def get_weaviate_client() -> weaviate.Client:
+def get_weaviate_client() -> weaviate.WeaviateClient:
+    """Return the shared v4 (gRPC) client, connecting on first use."""
     global _client
     if _client is None:
-        _client = weaviate.Client(url=WEAVIATE_URL)
+        with _client_lock:
+            if _client is None:
+                url = urlparse(WEAVIATE_URL)
+                secure = url.scheme == "https"
+                _client = weaviate.connect_to_custom(
+                    http_host=url.hostname,
+                    http_port=url.port or (443 if secure else 80),
+                    http_secure=secure,
+                    grpc_host=url.hostname,
+                    grpc_port=WEAVIATE_GRPC_PORT,
+                    grpc_secure=secure,
+                )
     return _client
 
 
-def semantic_search(question: str, top_k: int = 5) -> List[str]:
-    """Perform a vector search in Weaviate and return text chunks."""
-    client = get_weaviate_client()
-    result = (
-        client.query
-        .get("Document", ["text"])
-        .with_near_text({"concepts": [question]})
-        .with_limit(top_k)
-        .do()
-    )
-    texts: List[str] = [d["text"] for d in result["data"]["Get"]["Document"]]
+def close_weaviate_client() -> None:
+    """Close the shared client, if one was opened."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def get_embedder():
+    """Return the local query embedder, or None if RAG_EMBED_MODEL isn't set.
+
+    A model that fails to load is not retried; searches fall back to
+    Weaviate's vectorizer instead.
+    """
+    global _embedder, _embedder_failed
+    if not RAG_EMBED_MODEL or SentenceTransformer is None or _embedder_failed:
+        return None
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None and not _embedder_failed:
+                model_kwargs = {"file_name": RAG_EMBED_ONNX_FILE} if RAG_EMBED_ONNX_FILE else None
+                try:
+                    _embedder = SentenceTransformer(RAG_EMBED_MODEL, backend=RAG_EMBED_BACKEND,
+                                                    model_kwargs=model_kwargs)
+                except Exception as e:
+                    logger.warning("Local query embedder %s failed to load, using near_text: %s",
+                                   RAG_EMBED_MODEL, e)
+                    _embedder_failed = True
+    return _embedder
+
+
+def embed_questions(questions: List[str]) -> Optional[list]:
+    """Embed questions in one batch with the local embedder, if configured."""
+    embedder = get_embedder()
+    if embedder is None:
+        return None
+    return embedder.encode(questions, batch_size=32, normalize_embeddings=True)
+
+
+def semantic_search(question: str, top_k: int = 5,
+                    client: Optional[weaviate.WeaviateClient] = None,
+                    vector=None) -> List[str]:
+    """Perform a vector search in Weaviate and return text chunks.
+    
+    Uses a locally computed query vector when one is given (or a local embedder
+    is configured); otherwise Weaviate's vectorizer embeds the question.
+    """
+    client = client or get_weaviate_client()
+    collection = client.collections.get("Document")
+    if vector is None:
+        vectors = embed_questions([question])
+        vector = vectors[0] if vectors is not None else None
+    if vector is not None:
+        result = collection.query.near_vector(near_vector=vector.tolist(), limit=top_k,
+                                              return_properties=["text"])
+    else:
+        result = collection.query.near_text(query=question, limit=top_k, return_properties=["text"])
+    texts: List[str] = [o.properties["text"] for o in result.objects]
     return texts
 
 
-def generate_answer(question: str, context_chunks: List[str]) -> str:
+async def generate_answer(client: AsyncOpenAI, question: str, context_chunks: List[str],
+                          temperature: float = RAG_TEMPERATURE) -> str:
     """Call Ollama (OpenAI-compatible) to generate answer."""
     context = "\n".join(context_chunks)
     prompt = (
@@ -45,15 +144,46 @@ def generate_answer(question: str, context_chunks: List[str]) -> str:
         f"Context:\n{context}\n\n"
         f"Question: {question}\nAnswer:"
     )
-    response = openai.ChatCompletion.create(
+    response = await client.chat.completions.create(
         model=LLM_MODEL,
         messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
     )
     return response.choices[0].message.content.strip()
 
 
-def rag_query(question: str) -> dict:
-    """End-to-end RAG pipeline."""
-    chunks = semantic_search(question)
-    answer = generate_answer(question, chunks)
+async def _answer(client: AsyncOpenAI, question: str, chunks: List[str]) -> dict:
+    key = make_key(model=LLM_MODEL, question=question, chunks=tuple(chunks), temperature=RAG_TEMPERATURE)
+    answer, _ = await _answer_cache.alookup(key, temperature=RAG_TEMPERATURE)
+    if answer is None:
+        answer = await generate_answer(client, question, chunks, RAG_TEMPERATURE)
+        await _answer_cache.astore(key, answer, temperature=RAG_TEMPERATURE)
     return {"answer": answer, "sources": chunks}
+
+
+async def rag_query(client: AsyncOpenAI, question: str,
+                    weaviate_client: Optional[weaviate.WeaviateClient] = None) -> dict:
+    """End-to-end RAG pipeline."""
+    # The Weaviate client and local embedder are blocking; keep them off the event loop
+    chunks = await asyncio.to_thread(semantic_search, question, client=weaviate_client)
+    return await _answer(client, question, chunks)
+
+
+async def rag_batch_query(client: AsyncOpenAI, questions: List[str],
+                          weaviate_client: Optional[weaviate.WeaviateClient] = None,
+                          max_concurrency: int = 8) -> List[dict]:
+    """RAG pipeline for several questions, embedding them in a single batch.
+
+    At most ``max_concurrency`` questions are searched and answered at once, so
+    a large batch doesn't take over the default thread pool.
+    """
+    vectors = await asyncio.to_thread(embed_questions, questions)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def one(i: int, question: str) -> dict:
+        async with semaphore:
+            chunks = await asyncio.to_thread(semantic_search, question, client=weaviate_client,
+                                             vector=vectors[i] if vectors is not None else None)
+            return await _answer(client, question, chunks)
+
+    return list(await asyncio.gather(*(one(i, question) for i, question in enumerate(questions))))
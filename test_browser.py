@@ -1,7 +1,7 @@
 """Test script for the browser automation agent with improved error handling."""
 
 import asyncio
-import aiohttp
+import httpx
 import json
 import base64
 import time
@@ -9,6 +9,15 @@ from pathlib import Path
 
 BASE_URL = "http://localhost:8000"
 
+def make_client() -> httpx.AsyncClient:
+    """One keep-alive client for the whole run; navigations can be slow, so allow 60s."""
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        http2=True,
+        timeout=60,
+        limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=30)
+    )
+
 def save_screenshot(data: dict, filename: str):
     """Save a base64-encoded screenshot to a file."""
     if "screenshot" not in data:
@@ -22,21 +31,19 @@ def save_screenshot(data: dict, filename: str):
 
 async def browser_request(session, method, endpoint, **kwargs):
     """Make a request to the browser API with error handling."""
-    url = f"{BASE_URL}{endpoint}"
     try:
-        async with session.request(method, url, **kwargs) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                print(f"Error {response.status} from {endpoint}: {error_text}")
-                return None
-            return await response.json()
+        response = await session.request(method, endpoint, **kwargs)
+        if response.status_code != 200:
+            print(f"Error {response.status_code} from {endpoint}: {response.text}")
+            return None
+        return response.json()
     except Exception as e:
         print(f"Request to {endpoint} failed: {str(e)}")
         return None
 
 async def test_browser_automation():
     """Test the browser automation endpoints with improved reliability."""
-    async with aiohttp.ClientSession() as session:
+    async with make_client() as session:
         # Start the browser
         print("Starting browser...")
         start_result = await browser_request(session, 'POST', '/browser/start')
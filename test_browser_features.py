@@ -1,12 +1,72 @@
 """Comprehensive test for browser agent features."""
 
 import asyncio
-import aiohttp
+import httpx
 import json
-import base64
+import logging
+import os
+import sys
 from typing import Dict, Any
 
+try:  # SIMD-accelerated base64 when available
+    import pybase64 as _b64
+except ImportError:
+    import base64 as _b64
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    _encode = orjson.dumps
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+    def _encode(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 BASE_URL = "http://localhost:8000"
+# Set TEST_DEBUG=1 to print full responses (screenshots are large base64 strings)
+DEBUG = os.getenv("TEST_DEBUG") == "1"
+log = logging.getLogger(__name__)
+log.setLevel(logging.DEBUG if DEBUG else logging.WARNING)
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+TEST_URL = "https://httpbin.org/forms/post"
+FORM_DATA = [
+    ("input[name='custname']", "Test User"),
+    ("input[name='custtel']", "123-456-7890"),
+    ("input[value='small']", ""),  # Click radio button
+    ("select[name='topping']", "cheese"),
+    ("textarea[name='comments']", "This is a test comment")
+]
+
+# Request bodies are constant, so encode them once
+NAVIGATE_TEST_BODY = _encode({"url": TEST_URL})
+NAVIGATE_GOOGLE_BODY = _encode({"url": "https://www.google.com"})
+# One request for the whole form instead of one per field
+FILL_FORM_BODY = _encode({
+    "ops": [
+        {"action": "type", "selector": selector, "text": value} if value
+        else {"action": "click", "selector": selector}
+        for selector, value in FORM_DATA
+    ]
+})
+
+def make_session() -> httpx.AsyncClient:
+    """One keep-alive client for every request in the run.
+    
+    HTTP/2 multiplexes requests over one connection when the server speaks it
+    (e.g. run under hypercorn); against uvicorn it falls back to HTTP/1.1.
+    """
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        http2=True,
+        timeout=60,
+        limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=60)
+    )
 
 def save_screenshot(data: Dict[str, Any], filename: str) -> None:
     """Save a base64-encoded screenshot to a file."""
@@ -15,82 +75,87 @@ def save_screenshot(data: Dict[str, Any], filename: str) -> None:
         return
     
     try:
-        screenshot_data = base64.b64decode(data["screenshot"])
-        with open(filename, "wb") as f:
-            f.write(screenshot_data)
+        # Decode straight into one mutable buffer and write it without a copy
+        if hasattr(_b64, "b64decode_as_bytearray"):
+            buf = _b64.b64decode_as_bytearray(data["screenshot"], validate=False)
+        else:
+            buf = _b64.b64decode(data["screenshot"], validate=False)
+        # Raw fd: no Python-level buffering layer between the buffer and the OS
+        view = memoryview(buf)
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
         print(f"Screenshot saved to {filename}")
     except Exception as e:
         print(f"Failed to save screenshot: {str(e)}")
 
-async def test_feature(session: aiohttp.ClientSession, name: str, method: str, 
-                      endpoint: str, **kwargs) -> Dict[str, Any]:
-    """Test a single browser feature and return the result."""
+async def test_feature(session: httpx.AsyncClient, name: str, method: str, 
+                      endpoint: str, body: bytes = None) -> Dict[str, Any]:
+    """Test a single browser feature and return the result.
+    
+    ``body`` is a pre-encoded JSON request body.
+    """
     print(f"\n--- Testing {name} ---")
     try:
-        async with session.request(method, f"{BASE_URL}{endpoint}", **kwargs) as resp:
-            result = await resp.json()
-            print(f"Status: {resp.status}")
-            print(f"Response: {json.dumps(result, indent=2) if isinstance(result, dict) else result}")
-            return result
+        if method == "GET":
+            resp = await session.get(endpoint)
+        else:
+            resp = await session.post(endpoint, content=body,
+                                      headers=JSON_HEADERS if body is not None else None)
+        result = resp.json()
+        print(f"Status: {resp.status_code}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Response: %s", _dumps(result) if isinstance(result, dict) else result)
+        return result
     except Exception as e:
         print(f"Error: {str(e)}")
         return {"error": str(e)}
 
-async def run_browser_tests():
+async def run_browser_tests(session: httpx.AsyncClient):
     """Run all browser automation tests."""
-    async with aiohttp.ClientSession() as session:
-        # 1. Start the browser
-        await test_feature(session, "Start Browser", "POST", "/browser/start")
-        
-        # 2. Navigate to a test page
-        test_url = "https://httpbin.org/forms/post"
-        await test_feature(session, "Navigate to URL", "POST", 
-                         "/browser/navigate", 
-                         json={"url": test_url})
-        
-        # 3. Take a screenshot
-        screenshot = await test_feature(session, "Take Screenshot", "GET", "/browser/screenshot")
-        save_screenshot(screenshot, "test_navigation.png")
-        
-        # 4. Fill out a form
-        form_data = [
-            ("input[name='custname']", "Test User"),
-            ("input[name='custtel']", "123-456-7890"),
-            ("input[value='small']", ""),  # Click radio button
-            ("select[name='topping']", "cheese"),
-            ("textarea[name='comments']", "This is a test comment")
-        ]
-        
-        for selector, value in form_data:
-            if value:
-                await test_feature(session, f"Type in {selector}", "POST",
-                                 "/browser/type",
-                                 json={"selector": selector, "text": value})
-            else:
-                await test_feature(session, f"Click {selector}", "POST",
-                                 "/browser/click",
-                                 json={"selector": selector})
-        
-        # 5. Take another screenshot after form fill
-        screenshot = await test_feature(session, "Take Form Screenshot", "GET", "/browser/screenshot")
-        save_screenshot(screenshot, "test_form_filled.png")
-        
-        # 6. Get cookies
-        await test_feature(session, "Get Cookies", "GET", "/browser/cookies")
-        
-        # 7. Navigate to a different page
-        await test_feature(session, "Navigate to Google", "POST",
-                         "/browser/navigate",
-                         json={"url": "https://www.google.com"})
-        
-        # 8. Final screenshot
-        screenshot = await test_feature(session, "Final Screenshot", "GET", "/browser/screenshot")
-        save_screenshot(screenshot, "test_final.png")
-        
-        # 9. Close the browser
-        await test_feature(session, "Close Browser", "POST", "/browser/close")
+    # 1. Start the browser
+    await test_feature(session, "Start Browser", "POST", "/browser/start")
+    
+    # 2. Navigate to a test page
+    await test_feature(session, "Navigate to URL", "POST", 
+                     "/browser/navigate", 
+                     body=NAVIGATE_TEST_BODY)
+    
+    # 3. Take a screenshot
+    screenshot = await test_feature(session, "Take Screenshot", "GET", "/browser/screenshot")
+    save_screenshot(screenshot, "test_navigation.png")
+    
+    # 4. Fill out a form
+    await test_feature(session, "Fill form", "POST", "/browser/batch", body=FILL_FORM_BODY)
+    
+    # 5. Take another screenshot after form fill
+    screenshot = await test_feature(session, "Take Form Screenshot", "GET", "/browser/screenshot")
+    save_screenshot(screenshot, "test_form_filled.png")
+    
+    # 6. Get cookies
+    await test_feature(session, "Get Cookies", "GET", "/browser/cookies")
+    
+    # 7. Navigate to a different page
+    await test_feature(session, "Navigate to Google", "POST",
+                     "/browser/navigate",
+                     body=NAVIGATE_GOOGLE_BODY)
+    
+    # 8. Final screenshot
+    screenshot = await test_feature(session, "Final Screenshot", "GET", "/browser/screenshot")
+    save_screenshot(screenshot, "test_final.png")
+    
+    # 9. Close the browser
+    await test_feature(session, "Close Browser", "POST", "/browser/close")
+
+async def main():
+    async with make_session() as session:
+        await run_browser_tests(session)
 
 if __name__ == "__main__":
+    logging.basicConfig(stream=sys.stdout, format="%(message)s")
     print("=== Starting Browser Agent Tests ===")
-    asyncio.run(run_browser_tests())
+    asyncio.run(main())
     print("\n=== Tests Completed ===")
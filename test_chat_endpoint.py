@@ -2,13 +2,20 @@
 Test script for the chat endpoint with OpenRouter integration.
 """
 import requests
-import json
 import os
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Reused keep-alive connection to the local API server
+_session = requests.Session()
+
 def test_chat_endpoint():
     """Test the /chat endpoint with OpenRouter integration."""
     url = "http://localhost:8000/chat"
@@ -27,10 +34,10 @@ def test_chat_endpoint():
     
     try:
         print("Sending request to /chat endpoint...")
-        response = requests.post(url, json=payload)
+        response = _session.post(url, data=_json.dumps(payload), headers={"Content-Type": "application/json"})
         response.raise_for_status()
         
-        result = response.json()
+        result = _json.loads(response.content)
         
         if result["success"]:
             print("✅ Chat successful!")
@@ -8,10 +8,20 @@ It includes a mock LLM for testing without requiring API keys.
 import asyncio
 import json
 import os
+import re
 import sys
 import logging
 from unittest.mock import MagicMock
 
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, indent=2)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,9 +35,27 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 # Import the workflow function
 from backend.crew_workflow import run_avatar_workflow
 
+TECHCRUNCH_RESPONSE = """
+            Here's the latest AI news from TechCrunch:
+            
+            Title: "New Breakthrough in AI Research Shows Promise for Healthcare"
+            
+            Summary: Researchers have developed a new AI model that can analyze medical 
+            images with unprecedented accuracy, potentially revolutionizing diagnostics. 
+            The technology is still in early stages but shows great promise for 
+            improving patient outcomes.
+            """
+
+DEFAULT_RESPONSE = "This is a mock response from the test LLM. The actual workflow would use a real LLM in production."
+
 class MockLLM:
     """Mock LLM for testing without requiring API keys."""
     
+    # (trigger, response) pairs checked in order; compiled once for all instances
+    _patterns = [
+        (re.compile(r"TechCrunch"), TECHCRUNCH_RESPONSE),
+    ]
+    
     def __init__(self, *args, **kwargs):
         self.model_name = "mock-llm"
         self.temperature = 0.7
@@ -37,19 +65,10 @@ class MockLLM:
         logger.info(f"Mock LLM received prompt: {prompt[:200]}...")
         
         # Return different responses based on the prompt
-        if "TechCrunch" in prompt:
-            return """
-            Here's the latest AI news from TechCrunch:
-            
-            Title: "New Breakthrough in AI Research Shows Promise for Healthcare"
-            
-            Summary: Researchers have developed a new AI model that can analyze medical 
-            images with unprecedented accuracy, potentially revolutionizing diagnostics. 
-            The technology is still in early stages but shows great promise for 
-            improving patient outcomes.
-            """
-        else:
-            return "This is a mock response from the test LLM. The actual workflow would use a real LLM in production."
+        for pattern, response in self._patterns:
+            if pattern.search(prompt):
+                return response
+        return DEFAULT_RESPONSE
 
 def setup_mock_llm():
     """Set up a mock LLM for testing."""
@@ -88,17 +107,17 @@ def test_crewai_workflow():
     print(f"Prompt: {prompt}")
     
     try:
-        # Run the workflow (which is already synchronous)
+        # Run the workflow
         print("\nStarting workflow execution...")
-        result = run_avatar_workflow(prompt)
+        result = asyncio.run(run_avatar_workflow(prompt))
         
         print("\nWorkflow completed successfully!")
         print("\nResult:")
-        print(json.dumps(result, indent=2))
+        print(_dumps(result))
         
         # Save the result to a file for reference
         with open("test_workflow_result.json", "w") as f:
-            json.dump(result, f, indent=2)
+            f.write(_dumps(result))
         print("\nFull result saved to: test_workflow_result.json")
         
         return 0
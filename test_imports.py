@@ -1,14 +1,14 @@
 """Test script to verify CrewAI imports."""
 
 import sys
-import pkgutil
+import importlib.util
 
 def test_imports():
     """Test if we can import CrewAI components."""
     print("=== Testing CrewAI Imports ===\n")
     
     # Check if crewai is installed
-    if pkgutil.find_loader("crewai") is None:
+    if importlib.util.find_spec("crewai") is None:
         print("❌ Error: crewai package is not installed")
         print("Please install it with: pip install crewai")
         return False
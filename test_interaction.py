@@ -6,49 +6,54 @@ import json
 
 BASE_URL = "http://localhost:8000"
 
-async def test_interaction():
+async def test_interaction(session: aiohttp.ClientSession):
     """Test browser interaction with a simple page."""
-    async with aiohttp.ClientSession() as session:
-        print("1. Starting browser...")
-        async with session.post(f"{BASE_URL}/browser/start") as resp:
-            result = await resp.json()
-            print("   Result:", result)
-        
-        # Use a simple test page
-        test_url = "https://httpbin.org/forms/post"
-        print(f"\n2. Navigating to {test_url}...")
-        async with session.post(
-            f"{BASE_URL}/browser/navigate",
-            json={"url": test_url}
-        ) as resp:
-            result = await resp.json()
-            print("   Result:", json.dumps(result, indent=2))
-        
-        # Try to type in a form field
-        print("\n3. Typing in form field...")
-        async with session.post(
-            f"{BASE_URL}/browser/type",
-            json={"selector": "input[name='custname']", "text": "Test User"}
-        ) as resp:
-            result = await resp.json()
-            print("   Result:", result)
-        
-        # Take a screenshot
-        print("\n4. Taking screenshot...")
-        async with session.get(f"{BASE_URL}/browser/screenshot") as resp:
-            result = await resp.json()
-            if "screenshot" in result:
-                with open("interaction_test.png", "wb") as f:
-                    f.write(result["screenshot"].encode('latin1'))
-                print("   Screenshot saved to interaction_test.png")
-            else:
-                print("   Error:", result.get("error", "Unknown error"))
-        
-        print("\n5. Closing browser...")
-        async with session.post(f"{BASE_URL}/browser/close") as resp:
-            result = await resp.json()
-            print("   Result:", result)
+    print("1. Starting browser...")
+    async with session.post(f"{BASE_URL}/browser/start") as resp:
+        result = await resp.json()
+        print("   Result:", result)
+    
+    # Use a simple test page
+    test_url = "https://httpbin.org/forms/post"
+    print(f"\n2. Navigating to {test_url}...")
+    async with session.post(
+        f"{BASE_URL}/browser/navigate",
+        json={"url": test_url}
+    ) as resp:
+        result = await resp.json()
+        print("   Result:", json.dumps(result, indent=2))
+    
+    # Try to type in a form field
+    print("\n3. Typing in form field...")
+    async with session.post(
+        f"{BASE_URL}/browser/type",
+        json={"selector": "input[name='custname']", "text": "Test User"}
+    ) as resp:
+        result = await resp.json()
+        print("   Result:", result)
+    
+    # Take a screenshot
+    print("\n4. Taking screenshot...")
+    async with session.get(f"{BASE_URL}/browser/screenshot_raw") as resp:
+        if resp.status == 200:
+            data = await resp.read()
+            with open("interaction_test.png", "wb", buffering=0) as f:
+                f.write(data)
+            print("   Screenshot saved to interaction_test.png")
+        else:
+            print("   Error:", (await resp.json()).get("detail", "Unknown error"))
+    
+    print("\n5. Closing browser...")
+    async with session.post(f"{BASE_URL}/browser/close") as resp:
+        result = await resp.json()
+        print("   Result:", result)
+
+async def main():
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=0, limit_per_host=4, keepalive_timeout=60)
+    ) as session:
+        await test_interaction(session)
 
 if __name__ == "__main__":
     print("=== Browser Interaction Test ===")
-    asyncio.run(test_interaction())
+    asyncio.run(main())
@@ -6,13 +6,45 @@ This script tests the integration with Kimi K2 LLM using the llm_utils module.
 
 import os
 import sys
+import time
 import asyncio
+import tempfile
+import traceback
+from pathlib import Path
+import requests
 from dotenv import load_dotenv
 from llm_utils import LLMConfig, get_llm, LLMProvider
 
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
 # Load environment variables from .env file
 load_dotenv()
 
+# One keep-alive session for every call to the Kimi API
+_session = requests.Session()
+
+# The model list rarely changes, so reuse it across runs for an hour
+MODELS_CACHE_PATH = Path(tempfile.gettempdir()) / "kimi_models.json"
+MODELS_CACHE_TTL = 3600
+
+def get_models():
+    """Return the /models response data, from the disk cache when it is fresh."""
+    if MODELS_CACHE_PATH.exists() and time.time() - MODELS_CACHE_PATH.stat().st_mtime < MODELS_CACHE_TTL:
+        print(f"Using cached model list from {MODELS_CACHE_PATH}")
+        return _json.loads(MODELS_CACHE_PATH.read_bytes())
+    
+    models_response = _session.get("https://api.moonshot.cn/v1/models")
+    print(f"Status code: {models_response.status_code}")
+    if models_response.status_code != 200:
+        print(f"Error response: {models_response.text}")
+        return None
+    
+    MODELS_CACHE_PATH.write_bytes(models_response.content)
+    return _json.loads(models_response.content)
+
 async def test_kimi_integration():
     """Test Kimi K2 LLM integration with detailed error handling."""
     print("=== Testing Kimi K2 LLM Integration ===\n")
@@ -61,24 +93,16 @@ async def test_kimi_integration():
             
             # Try to make a direct API call first to validate the key and model
             try:
-                import requests
-                
-                headers = {
+                _session.headers.update({
                     "Authorization": f"Bearer {kimi_api_key}",
                     "Content-Type": "application/json"
-                }
+                })
                 
                 # Test the models endpoint
                 print("\nTesting API access with direct call to /models...")
-                models_response = requests.get(
-                    "https://api.moonshot.cn/v1/models",
-                    headers=headers
-                )
+                models_data = get_models()
                 
-                print(f"Status code: {models_response.status_code}")
-                
-                if models_response.status_code == 200:
-                    models_data = models_response.json()
+                if models_data is not None:
                     print("\nAvailable models:")
                     print("-" * 50)
                     if 'data' in models_data and models_data['data']:
@@ -87,8 +111,6 @@ async def test_kimi_integration():
                     else:
                         print("No models found in the response.")
                     print("-" * 50)
-                else:
-                    print(f"Error response: {models_response.text}")
                 
                 # Test the completions endpoint
                 print("\nTesting completions endpoint...")
@@ -101,9 +123,8 @@ async def test_kimi_integration():
                     "max_tokens": 100
                 }
                 
-                completion_response = requests.post(
+                completion_response = _session.post(
                     "https://api.moonshot.cn/v1/chat/completions",
-                    headers=headers,
                     json=completion_data
                 )
                 
@@ -123,7 +144,6 @@ async def test_kimi_integration():
                 
             except Exception as e:
                 print(f"\n❌ Error making direct API call: {str(e)}")
-                import traceback
                 traceback.print_exc()
             
             # If we get here, the direct API call failed, try with LangChain
@@ -137,7 +157,6 @@ async def test_kimi_integration():
                 return True
             except Exception as e:
                 print(f"\n❌ Error with LangChain integration: {str(e)}")
-                import traceback
                 traceback.print_exc()
                 
                 # If we get a 404, the model name is likely incorrect
@@ -150,7 +169,6 @@ async def test_kimi_integration():
                     
         except Exception as e:
             print(f"\n❌ Unexpected error with model {model_name}: {str(e)}")
-            import traceback
             traceback.print_exc()
             continue
     
@@ -1,4 +1,5 @@
 """Test script for OpenRouter multi-model integration."""
+import asyncio
 import os
 from dotenv import load_dotenv
 from openrouter_client import OpenRouterClient
@@ -6,13 +7,13 @@ from openrouter_client import OpenRouterClient
 # Load environment variables
 load_dotenv()
 
-def test_openrouter():
+async def test_openrouter():
     """Test the OpenRouter client with multiple models."""
     # Initialize client
     client = OpenRouterClient()
     
     # Test with multiple models and fallbacks
-    response = client.chat(
+    response = await client.chat(
         message="Explain quantum computing in simple terms",
         model="anthropic/claude-2:free",
         fallbacks=["google/gemini-pro:free", "mistral/mistral-7b:free"],
@@ -36,6 +37,8 @@ def test_openrouter():
     print("\nAvailable free models:")
     for i, model in enumerate(client.free_models, 1):
         print(f"{i}. {model}")
+    
+    await client.aclose()
 
 if __name__ == "__main__":
-    test_openrouter()
+    asyncio.run(test_openrouter())
@@ -26,9 +26,7 @@ async def test_browser_agent():
         
         # Take a screenshot
         print("\nTaking screenshot...")
-        screenshot = await browser.take_screenshot()
-        with open("test_simple_screenshot.png", "wb") as f:
-            f.write(screenshot['screenshot'].encode('latin1'))
+        await browser.take_screenshot(path="test_simple_screenshot.png")
         print("Screenshot saved to test_simple_screenshot.png")
         
         return {"status": "success", "title": content.get('title', 'No title')}
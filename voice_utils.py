@@ -6,11 +6,38 @@ ELEVENLABS_API_KEY and D_ID_API_KEY environment variables configured.
 
 from __future__ import annotations
 
-import base64
+import asyncio
 import os
-from typing import Dict
+from typing import Any, Dict
+
+import aiohttp
+
+try:  # SIMD-accelerated base64 when available
+    import pybase64 as _b64
+except ImportError:
+    import base64 as _b64
+
+# Shared session so both providers' connections (and TLS sessions) are reused
+_session: aiohttp.ClientSession | None = None
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=60),
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared session (call on application shutdown)."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
 
-import requests
 
 # --- ElevenLabs TTS ---------------------------------------------------
 
@@ -18,7 +45,8 @@ ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 EL_TTS_ENDPOINT = "https://api.elevenlabs.io/v1/text-to-speech"
 
 
-def tts(text: str, voice_id: str = "Rachel") -> Dict[str, str]:
+async def tts(text: str, voice_id: str = "Rachel", encode: bool = True) -> Dict[str, Any]:
+    """Synthesize speech. Returns base64 "audio_base64", or raw MP3 "audio" bytes if encode=False."""
     if not ELEVENLABS_API_KEY:
         return {"error": "ELEVENLABS_API_KEY not set"}
     url = f"{EL_TTS_ENDPOINT}/{voice_id}"
@@ -31,20 +59,33 @@ def tts(text: str, voice_id: str = "Rachel") -> Dict[str, str]:
         "model_id": "eleven_multilingual_v2",
         "voice_settings": {"stability": 0.3, "similarity_boost": 0.7},
     }
-    r = requests.post(url, json=payload, headers=headers)
-    if r.status_code != 200:
-        return {"error": f"TTS failed ({r.status_code})", "details": r.text}
-    audio_b64 = base64.b64encode(r.content).decode()
+    session = await _get_session()
+    async with session.post(url, json=payload, headers=headers) as r:
+        if r.status != 200:
+            return {"error": f"TTS failed ({r.status})", "details": await r.text()}
+        if not encode:
+            return {"audio": await r.read()}
+        # Accumulate into one buffer and encode from a view of it, so the audio
+        # isn't copied again into an intermediate bytes object
+        audio = bytearray()
+        async for chunk in r.content.iter_chunked(64 * 1024):
+            audio.extend(chunk)
+    audio_b64 = _b64.b64encode(memoryview(audio)).decode("ascii")
     return {"audio_base64": audio_b64}
 
 
+def tts_sync(text: str, voice_id: str = "Rachel", encode: bool = True) -> Dict[str, Any]:
+    """Blocking wrapper around tts() for scripts without an event loop."""
+    return asyncio.run(_run_and_close(tts(text, voice_id, encode)))
+
+
 # --- D-ID Lip-sync -----------------------------------------------------
 
 DID_API_KEY = os.getenv("D_ID_API_KEY")
 DID_ENDPOINT = "https://api.d-id.com/talks"
 
 
-def lip_sync(audio_b64: str, image_url: str) -> Dict[str, str]:
+async def lip_sync(audio_b64: str, image_url: str) -> Dict[str, str]:
     if not DID_API_KEY:
         return {"error": "D_ID_API_KEY not set"}
     headers = {"Authorization": f"Basic {DID_API_KEY}", "Content-Type": "application/json"}
@@ -53,8 +94,22 @@ def lip_sync(audio_b64: str, image_url: str) -> Dict[str, str]:
         "source_url": image_url,
         "driver_url": "bank://lively"
     }
-    r = requests.post(DID_ENDPOINT, json=payload, headers=headers)
-    if r.status_code != 201:
-        return {"error": f"Lip-sync failed ({r.status_code})", "details": r.text}
-    resp = r.json()
+    session = await _get_session()
+    async with session.post(DID_ENDPOINT, json=payload, headers=headers) as r:
+        if r.status != 201:
+            return {"error": f"Lip-sync failed ({r.status})", "details": await r.text()}
+        resp = await r.json()
     return {"video_url": resp.get("result_url", "")}
+
+
+def lip_sync_sync(audio_b64: str, image_url: str) -> Dict[str, str]:
+    """Blocking wrapper around lip_sync() for scripts without an event loop."""
+    return asyncio.run(_run_and_close(lip_sync(audio_b64, image_url)))
+
+
+async def _run_and_close(coro):
+    # asyncio.run() creates a fresh loop each time, so the session can't outlive it
+    try:
+        return await coro
+    finally:
+        await close_session()